@@ -0,0 +1,233 @@
+"""
+Benchmark suite for the cleaning and decoding pipeline.
+
+Generates a synthetic IVR export per size (see benchmarks.synthetic), then times each stage
+of the pipeline the CLI and the tabs run (process_file, rename_columns, keypress decode,
+derived groups, drop_duplicates_from_dataframe and export) and records the peak resident
+memory of each stage. Every size runs in a fresh worker process so one size's memory does
+not leak into the next size's peaks. Results are printed as a table and written as JSON,
+and can be compared with an earlier run.
+
+Usage (from the app directory):
+    python -m benchmarks --rows 10000 1000000 10000000 --output bench.json
+    python -m benchmarks --rows 1000000 --compare bench.json
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import threading
+import subprocess
+import multiprocessing
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from benchmarks.synthetic import generate_ivr_csv, synthetic_questionnaire, write_script
+from module.data_cleaner_module.data_cleaning_utils.data_cleaner_utils import process_file
+from module.data_cleaner_module.data_cleaning_utils.columns_definer_utils import rename_columns
+from module.data_cleaner_module.data_cleaning_utils.rows_definer_utils import drop_duplicates_from_dataframe
+from module.data_cleaner_module.data_cleaning_utils.decode_plan import DecodePlan
+from module.data_cleaner_module.data_cleaning_utils.questionnaire_schema import load_schema
+from module.data_cleaner_module.data_cleaning_utils.group_classifier import add_derived_groups
+from module.data_cleaner_module.data_cleaning_utils.export_utils import EXPORT_FORMATS, write_dataframe
+from module.data_cleaner_module.data_cleaning_utils.session_store import enable_copy_on_write
+from module.data_cleaner_module.data_cleaning_utils.instrumentation import rss_bytes
+
+DEFAULT_ROWS = [10_000, 1_000_000, 10_000_000]
+RESULTS_VERSION = 1
+SAMPLE_INTERVAL = 0.005  # Seconds between resident memory samples
+
+class PeakMemory:
+    """
+    Context manager sampling the resident set size in a background thread, recording the
+    RSS when entered and its peak until exit. Both are None on platforms without /proc.
+    """
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.start_bytes: Optional[int] = None
+        self.peak_bytes: Optional[int] = None
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        while not self._done.wait(self.interval):
+            rss = rss_bytes()
+            if rss is not None and rss > self.peak_bytes:
+                self.peak_bytes = rss
+
+    def __enter__(self) -> "PeakMemory":
+        self.start_bytes = self.peak_bytes = rss_bytes()
+        if self.start_bytes is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._done.set()
+        if self._thread is not None:
+            self._thread.join()
+            self.peak_bytes = max(self.peak_bytes, rss_bytes() or 0)
+
+class StageBenchmark:
+    """
+    Times pipeline stages and records their peak memory; repeated stages keep the fastest run
+    and the highest peak.
+    """
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, Any]] = {}
+
+    def run(self, stage: str, func, *args, **kwargs) -> Any:
+        with PeakMemory() as memory:
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            seconds = time.perf_counter() - start
+        rows = len(result[0] if isinstance(result, tuple) else result) if result is not None else None
+
+        entry = self.stages.setdefault(stage, {"stage": stage, "seconds": seconds, "runs": [], "rows_out": rows, "peak_rss_bytes": None, "rss_increase_bytes": None})
+        entry["runs"].append(round(seconds, 6))
+        entry["seconds"] = min(entry["runs"])
+        if memory.peak_bytes is not None:
+            entry["peak_rss_bytes"] = max(entry["peak_rss_bytes"] or 0, memory.peak_bytes)
+            entry["rss_increase_bytes"] = max(entry["rss_increase_bytes"] or 0, memory.peak_bytes - memory.start_bytes)
+        return result
+
+    def results(self) -> List[Dict[str, Any]]:
+        return list(self.stages.values())
+
+def _decode(renamed_data: pd.DataFrame, schema) -> pd.DataFrame:
+    return DecodePlan.from_schema(schema, renamed_data.columns[1:-1]).apply(renamed_data)
+
+def _dedupe(decoded_data: pd.DataFrame) -> pd.DataFrame:
+    return drop_duplicates_from_dataframe(decoded_data).dropna()
+
+def benchmark_file(csv_path: str, script_path: str, repeat: int = 1, formats: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Runs the pipeline on one export `repeat` times and returns the per-stage results.
+
+    Parameters:
+    - csv_path (str): The IVR export.
+    - script_path (str): Its questionnaire script (.txt or .json).
+    - repeat (int): Number of runs; each stage reports its fastest run.
+    - formats (list): EXPORT_FORMATS to time the export of the decoded data in (default: Parquet).
+
+    Returns:
+    - list: One dict per stage with seconds, all runs, rows out, peak RSS and RSS increase in bytes.
+    """
+    enable_copy_on_write()
+    schema = load_schema(script_path)
+    bench = StageBenchmark()
+    with tempfile.TemporaryDirectory(prefix='ivr_bench_') as out_dir:
+        for _ in range(repeat):
+            cleaned_data = bench.run('process', process_file, csv_path)[0]
+            renamed_data = bench.run('rename', lambda: rename_columns(cleaned_data, schema.column_names(list(cleaned_data.columns))))
+            decoded_data = bench.run('decode', _decode, renamed_data, schema)
+            decoded_data = bench.run('groups', add_derived_groups, decoded_data)[0]
+            decoded_data = bench.run('dedupe', _dedupe, decoded_data)
+            for fmt in formats or ['Parquet']:
+                path = os.path.join(out_dir, 'decoded' + EXPORT_FORMATS[fmt][0])
+                bench.run(f'export_{fmt.lower()}', write_dataframe, decoded_data, fmt, path)
+            del cleaned_data, renamed_data, decoded_data
+    return bench.results()
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment() -> Dict[str, Any]:
+    """
+    Describes the machine and library versions a run was made with.
+    """
+    return {
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "pyarrow": pa.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+def run_suite(rows: List[int], data_dir: str, questions: int = 5, answers: int = 4, pickup_rate: float = 0.3, repeat: int = 1, formats: Optional[List[str]] = None, seed: int = 0) -> Dict[str, Any]:
+    """
+    Generates (or reuses) one export per size in data_dir and benchmarks each in a fresh process.
+
+    Returns:
+    - dict: The machine-readable results (version, created, environment, config, results per size).
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    questionnaire = synthetic_questionnaire(questions, answers)
+    script_path = os.path.join(data_dir, f'script_q{questions}_a{answers}.txt')
+    write_script(script_path, questionnaire)
+
+    config = {"rows": rows, "questions": questions, "answers": answers, "pickup_rate": pickup_rate, "repeat": repeat, "formats": formats or ['Parquet'], "seed": seed}
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for size in rows:
+        csv_path = os.path.join(data_dir, f'ivr_{size}_q{questions}_a{answers}_p{pickup_rate}_s{seed}.csv')
+        if not os.path.exists(csv_path):
+            print(f"Generating {size:,} calls ...", file=sys.stderr, flush=True)
+            generate_ivr_csv(csv_path + '.tmp', size, questionnaire, pickup_rate=pickup_rate, seed=seed)
+            os.replace(csv_path + '.tmp', csv_path)
+
+        print(f"Benchmarking {size:,} calls ...", file=sys.stderr, flush=True)
+        with context.Pool(1) as pool:
+            stages = pool.apply(benchmark_file, (csv_path, script_path, repeat, formats))
+        results.append({"rows": size, "file_bytes": os.path.getsize(csv_path), "stages": stages})
+
+    return {"version": RESULTS_VERSION, "created": datetime.now().isoformat(timespec='seconds'), "environment": environment(), "config": config, "results": results}
+
+def _mib(nbytes: Optional[int]) -> str:
+    return f"{nbytes / 1024 ** 2:,.1f}" if nbytes is not None else "-"
+
+def format_results(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Formats a report as a text table; with a baseline report, adds the baseline time and speedup per stage.
+    """
+    base_seconds = {(result["rows"], stage["stage"]): stage["seconds"] for result in (baseline or {}).get("results", []) for stage in result["stages"]}
+    header = f"{'rows':>12}  {'stage':<16}{'seconds':>10}{'rows out':>14}{'peak MiB':>11}{'+MiB':>10}"
+    if baseline:
+        header += f"{'baseline':>10}{'speedup':>9}"
+    lines = [header]
+    for result in report["results"]:
+        for stage in result["stages"]:
+            rows_out = f"{stage['rows_out']:,}" if stage["rows_out"] is not None else "-"
+            line = f"{result['rows']:>12,}  {stage['stage']:<16}{stage['seconds']:>10.3f}{rows_out:>14}{_mib(stage['peak_rss_bytes']):>11}{_mib(stage['rss_increase_bytes']):>10}"
+            if baseline:
+                base = base_seconds.get((result["rows"], stage["stage"]))
+                line += f"{base:>10.3f}{base / stage['seconds']:>8.2f}x" if base is not None and stage["seconds"] > 0 else f"{'-':>10}{'-':>9}"
+            lines.append(line)
+    return "\n".join(lines)
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the IVR cleaning and decoding pipeline on synthetic exports.")
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS, help="Export sizes in calls (default: 10000 1000000 10000000)")
+    parser.add_argument('--questions', type=int, default=5, help="Number of questions (default: 5)")
+    parser.add_argument('--answers', type=int, default=4, help="Options per generic question, 1-9 (default: 4)")
+    parser.add_argument('--pickup-rate', type=float, default=0.3, help="Share of calls with keypresses (default: 0.3)")
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per size; each stage reports its fastest run (default: 1)")
+    parser.add_argument('--formats', nargs='+', default=['Parquet'], choices=list(EXPORT_FORMATS), help="Export formats to time (default: Parquet)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed of the generated exports (default: 0)")
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'ivr_benchmarks'), help="Where generated exports are kept and reused (default: a directory in the system temp dir)")
+    parser.add_argument('--output', default=None, help="Write the results as JSON to this file")
+    parser.add_argument('--compare', default=None, help="Results JSON of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.rows, args.data_dir, args.questions, args.answers, args.pickup_rate, args.repeat, args.formats, args.seed)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print(format_results(report, baseline))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
@@ -0,0 +1,171 @@
+"""
+Synthetic IVR campaign exports and matching questionnaire scripts.
+
+The CSVs follow the dialer export layout process_file expects: a report title line, a
+header line with PhoneNo ... UserKeyPress, then one row per call where answered calls
+carry one FlowNo_n=m keypress per answered question (question k is FlowNo_{k+1}).
+Rows are ragged like real exports unless rectangular=True pads every row to full width.
+
+Usage (from the app directory):
+    python -m benchmarks.synthetic out/campaign.csv --rows 1000000 --script out/script.txt
+"""
+import io
+import json
+import argparse
+import numpy as np
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
+
+Questionnaire = List[Tuple[str, List[str]]]
+
+QUESTION_BANK: Questionnaire = [
+    ("Age group", ["18-30", "31-45", "46-60", "60+"]),
+    ("Gender", ["Male", "Female", "Other", "NA"]),
+    ("IncomeRange", ["RM4,850 & below", "RM4,851 to RM10,960", "RM10,961 to RM15,039", "RM15,040 & above"])
+]
+
+FIRST_PHONE = 60120000000
+CALL_DATE = "2024-01-01"
+INVALID_PHONE = "N/A"
+DEFAULT_CHUNK_ROWS = 500_000
+
+def synthetic_questionnaire(questions: int = 5, answers: int = 4) -> Questionnaire:
+    """
+    Builds a questionnaire: the demographic questions of QUESTION_BANK first (so IncomeGroup
+    is derived as in production), then generic questions with `answers` options each.
+
+    Parameters:
+    - questions (int): Number of questions.
+    - answers (int): Options per generic question (1-9, keypresses are single digits).
+
+    Returns:
+    - list: (question text, answer labels) pairs in script order.
+    """
+    if not 1 <= answers <= 9:
+        raise ValueError("answers must be between 1 and 9 (keypresses are single digits).")
+    bank = QUESTION_BANK[:questions]
+    generic = [(f"Question {idx}", [f"Option {option}" for option in range(1, answers + 1)]) for idx in range(len(bank) + 1, questions + 1)]
+    return bank + generic
+
+def script_text(questionnaire: Questionnaire) -> str:
+    """
+    Formats a questionnaire as a .txt script ("1. Question" lines followed by "- answer" lines).
+    """
+    lines = []
+    for idx, (question, labels) in enumerate(questionnaire, start=1):
+        lines.append(f"{idx}. {question}")
+        lines.extend(f"- {label}" for label in labels)
+    return "\n".join(lines) + "\n"
+
+def flow_mapping(questionnaire: Questionnaire) -> Dict[str, Dict[str, Any]]:
+    """
+    Returns the questionnaire as a .json flow mapping ({"Q1": {"question": ..., "answers": {"FlowNo_2=1": ...}}}).
+    """
+    return {
+        f"Q{idx}": {"question": question, "answers": {f"FlowNo_{idx + 1}={option}": label for option, label in enumerate(labels, start=1)}}
+        for idx, (question, labels) in enumerate(questionnaire, start=1)
+    }
+
+def write_script(path: str, questionnaire: Questionnaire) -> None:
+    """
+    Writes the questionnaire as a .json flow mapping if path ends with .json, else as a .txt script.
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        if path.lower().endswith('.json'):
+            json.dump(flow_mapping(questionnaire), f, ensure_ascii=False, indent=2)
+        else:
+            f.write(script_text(questionnaire))
+
+def _csv_lines(start: int, rows: int, answer_counts: List[int], rng: np.random.Generator, pickup_rate: float, complete_rate: float, duplicate_rate: float, invalid_phone_rate: float, rectangular: bool) -> Tuple[np.ndarray, int]:
+    """
+    Builds the CSV lines of rows start..start+rows as an object array, one vectorised string
+    operation per column. Returns the lines and the number of complete responses among them.
+    """
+    questions = len(answer_counts)
+    positions = np.arange(start, start + rows)
+
+    # Redials reuse the number of an earlier call
+    phones = FIRST_PHONE + positions
+    redial = (rng.random(rows) < duplicate_rate) & (positions > 0)
+    phones[redial] = FIRST_PHONE + (rng.random(int(redial.sum())) * positions[redial]).astype(np.int64)
+    phone_text = phones.astype(str).astype(object)
+    phone_text[rng.random(rows) < invalid_phone_rate] = INVALID_PHONE
+
+    # Answered calls finish the questionnaire or drop out after 1..questions-1 answers
+    picked_up = rng.random(rows) < pickup_rate
+    complete = picked_up & ((rng.random(rows) < complete_rate) | (questions == 1))
+    answered = np.where(complete, questions, 0)
+    partial = picked_up & ~complete
+    answered[partial] = rng.integers(1, max(questions, 2), int(partial.sum()))
+
+    status = np.where(picked_up, ",ANSWERED", ",NOANSWER").astype(object)
+    lines = phone_text + f",{CALL_DATE}" + status
+    for q, options in enumerate(answer_counts):
+        keypress = (f",FlowNo_{q + 2}=" + rng.integers(1, options + 1, rows).astype(str)).astype(object)
+        missing = "," if rectangular or q == 0 else ""
+        lines = lines + np.where(answered > q, keypress, missing)
+    return lines, int(complete.sum())
+
+def generate_ivr_csv(target: Union[str, BinaryIO], rows: int, questionnaire: Optional[Questionnaire] = None, pickup_rate: float = 0.3, complete_rate: float = 0.7, duplicate_rate: float = 0.02, invalid_phone_rate: float = 0.001, rectangular: bool = False, seed: int = 0, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Dict[str, int]:
+    """
+    Writes a synthetic IVR export, `chunk_rows` calls at a time so memory stays bounded.
+
+    Parameters:
+    - target (str or binary file): The output path or an open binary file.
+    - rows (int): Number of calls (data rows).
+    - questionnaire (list): The questionnaire answered by the calls (default: synthetic_questionnaire()).
+    - pickup_rate (float): Share of calls with at least one keypress.
+    - complete_rate (float): Share of picked-up calls that answer every question.
+    - duplicate_rate (float): Share of calls redialling an earlier number.
+    - invalid_phone_rate (float): Share of calls whose PhoneNo is not a phone number.
+    - rectangular (bool): Pad every row to the full width instead of writing ragged rows.
+    - seed (int): Random seed; the same arguments always produce the same file.
+    - chunk_rows (int): Calls generated and written per chunk.
+
+    Returns:
+    - dict: rows, complete_responses (before phone validation and deduplication) and bytes written.
+    """
+    questionnaire = synthetic_questionnaire() if questionnaire is None else questionnaire
+    answer_counts = [len(labels) for _, labels in questionnaire]
+    rng = np.random.default_rng(seed)
+
+    header = "PhoneNo,CallDate,Status,UserKeyPress" + ("," * (len(answer_counts) - 1) if rectangular else "")
+    complete_responses = 0
+    written = 0
+    f = open(target, 'wb') if isinstance(target, str) else target
+    try:
+        text = io.TextIOWrapper(f, encoding='utf-8', newline='', write_through=True)
+        written += text.write(f"Campaign Report,Generated {CALL_DATE}\n{header}\n")
+        for start in range(0, rows, chunk_rows):
+            lines, complete = _csv_lines(start, min(chunk_rows, rows - start), answer_counts, rng, pickup_rate, complete_rate, duplicate_rate, invalid_phone_rate, rectangular)
+            written += text.write("\n".join(lines.tolist()) + "\n")
+            complete_responses += complete
+        text.detach()
+    finally:
+        if isinstance(target, str):
+            f.close()
+    return {"rows": rows, "complete_responses": complete_responses, "bytes": written}
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic IVR export and its questionnaire script.")
+    parser.add_argument('output', help="Path of the CSV to write")
+    parser.add_argument('--rows', type=int, default=10_000, help="Number of calls (default: 10000)")
+    parser.add_argument('--questions', type=int, default=5, help="Number of questions (default: 5)")
+    parser.add_argument('--answers', type=int, default=4, help="Options per generic question, 1-9 (default: 4)")
+    parser.add_argument('--pickup-rate', type=float, default=0.3, help="Share of calls with keypresses (default: 0.3)")
+    parser.add_argument('--complete-rate', type=float, default=0.7, help="Share of picked-up calls answering every question (default: 0.7)")
+    parser.add_argument('--duplicate-rate', type=float, default=0.02, help="Share of calls redialling an earlier number (default: 0.02)")
+    parser.add_argument('--invalid-phone-rate', type=float, default=0.001, help="Share of calls with an invalid PhoneNo (default: 0.001)")
+    parser.add_argument('--rectangular', action='store_true', help="Pad every row to the full width")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument('--script', default=None, help="Also write the questionnaire script here (.txt, or .json for a flow mapping)")
+    args = parser.parse_args(argv)
+
+    questionnaire = synthetic_questionnaire(args.questions, args.answers)
+    stats = generate_ivr_csv(args.output, args.rows, questionnaire, args.pickup_rate, args.complete_rate, args.duplicate_rate, args.invalid_phone_rate, args.rectangular, args.seed)
+    if args.script:
+        write_script(args.script, questionnaire)
+    print(f"Wrote {stats['rows']:,} calls ({stats['complete_responses']:,} complete responses, {stats['bytes'] / 1024 ** 2:,.1f} MiB) to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
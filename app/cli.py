@@ -0,0 +1,136 @@
+"""
+Headless batch pipeline for IVR campaign exports.
+
+Runs the same steps as the Data Processor, Columns Definer and Rows Definer tabs
+(process_file, rename_columns, keypress decoding, derived groups and the final
+dedupe) on a directory of IVR CSV files, without Streamlit, and writes the cleaned
+data, dialed phone numbers and decoded data as CSV, Parquet or Feather files.
+
+Usage (from the repository root):
+    python app/cli.py path/to/csv_dir --script path/to/script.txt --output out/ --workers 8
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+from typing import Dict, List
+
+from module.data_cleaner_module.data_cleaning_utils.data_cleaner_utils import CampaignAccumulator, process_files_parallel
+from module.data_cleaner_module.data_cleaning_utils.columns_definer_utils import rename_columns
+from module.data_cleaner_module.data_cleaning_utils.rows_definer_utils import drop_duplicates_from_dataframe
+from module.data_cleaner_module.data_cleaning_utils.decode_plan import DecodePlan
+from module.data_cleaner_module.data_cleaning_utils.questionnaire_schema import load_schema
+from module.data_cleaner_module.data_cleaning_utils.group_classifier import add_derived_groups, load_classifiers
+from module.data_cleaner_module.data_cleaning_utils.export_utils import EXPORT_FORMATS, with_extension, write_dataframe
+from module.data_cleaner_module.data_cleaning_utils.session_store import enable_copy_on_write
+from module.data_cleaner_module.data_cleaning_utils.instrumentation import Tracer, activate
+
+class StageTimer:
+    """
+    Prints the wall time of each pipeline stage as it finishes.
+    """
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._stage = None
+        self._start = 0.0
+
+    def start(self, stage: str) -> None:
+        self._stage = stage
+        self._start = time.perf_counter()
+
+    def stop(self, rows: int) -> None:
+        elapsed = time.perf_counter() - self._start
+        self.timings[self._stage] = elapsed
+        print(f"{self._stage:<10} {elapsed:9.2f}s  {rows:>12,} rows", flush=True)
+
+def run_pipeline(input_dir: str, script_path: str, output_dir: str, max_workers: int = None, chunksize: int = None, plan_path: str = None, export_format: str = 'CSV', groups_path: str = None) -> int:
+    timer = StageTimer()
+    formatted_date = datetime.now().strftime("%Y%m%d")
+    os.makedirs(output_dir, exist_ok=True)
+
+    csv_paths = sorted(os.path.join(input_dir, name) for name in os.listdir(input_dir) if name.lower().endswith('.csv'))
+    if not csv_paths:
+        print(f"No CSV files found in {input_dir}", file=sys.stderr)
+        return 1
+
+    timer.start('process')
+    campaign = CampaignAccumulator()
+    files = [(os.path.basename(path), path) for path in csv_paths]
+    for file_name, result, error in process_files_parallel(files, max_workers=max_workers, chunksize=chunksize):
+        if error:
+            print(error, file=sys.stderr)
+            continue
+        rejected_phones = result[0].attrs.get('rejected_phones', {})
+        if rejected_phones.get('count'):
+            print(f"{file_name}: {rejected_phones['count']:,} rows with invalid phone numbers dropped (e.g. {', '.join(rejected_phones['sample'][:5])})", file=sys.stderr)
+        campaign.add(*result)
+    cleaned_data = campaign.merged()
+    timer.stop(len(cleaned_data))
+
+    if cleaned_data.empty:
+        print("No complete responses found in the input files.", file=sys.stderr)
+        return 1
+
+    timer.start('rename')
+    schema = load_schema(script_path)
+    renamed_data = rename_columns(cleaned_data, schema.column_names(list(cleaned_data.columns)))
+    timer.stop(len(renamed_data))
+
+    timer.start('decode')
+    decode_plan = DecodePlan.from_schema(schema, renamed_data.columns[1:-1])
+    if plan_path:
+        saved_plan = DecodePlan.load(plan_path)
+        decode_plan = decode_plan.with_edits(saved_plan.keypress_mappings, saved_plan.excluded_flow_nos, saved_plan.drop_cols)
+    decoded_data = decode_plan.apply(renamed_data)
+    decoded_data, unmatched_groups = add_derived_groups(decoded_data, load_classifiers(groups_path) if groups_path else None)
+    for target, unmatched in unmatched_groups.items():
+        print(f"{unmatched.sum():,} rows have labels that match no {target}: {', '.join(map(str, unmatched.index[:5]))}", file=sys.stderr)
+    timer.stop(len(decoded_data))
+
+    timer.start('dedupe')
+    decoded_data = drop_duplicates_from_dataframe(decoded_data).dropna()
+    timer.stop(len(decoded_data))
+
+    timer.start('write')
+    outputs = [
+        (f'IVR_Cleaned_Data_v{formatted_date}', cleaned_data),
+        (f'IVR_Dialed_Phonenum_v{formatted_date}', campaign.phonenum()),
+        (f'IVR_Decoded_Data_v{formatted_date}', decoded_data)
+    ]
+    for filename, df in outputs:
+        write_dataframe(df, export_format, os.path.join(output_dir, with_extension(filename, export_format)))
+    timer.stop(len(cleaned_data) + len(decoded_data))
+
+    print(f"Files processed: {campaign.file_count}/{len(csv_paths)}")
+    print(f"Total calls made: {campaign.total_calls_made:,}")
+    print(f"Total of pick-ups: {campaign.total_pickups:,}")
+    print(f"Pick-up Rate: {campaign.pick_up_rate_percentage:.2f}%")
+    print(f"Total Cleaned CRs: {len(decoded_data):,}")
+    print(f"Total time: {sum(timer.timings.values()):.2f}s")
+    return 0
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Clean, rename and decode a directory of IVR CSV exports without Streamlit.")
+    parser.add_argument('input_dir', help="Directory containing the IVR .csv exports")
+    parser.add_argument('--script', required=True, help="Questionnaire script (.txt with formatting or .json flow mapping)")
+    parser.add_argument('--output', default='output', help="Directory the CSV outputs are written to (default: output)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: number of CPUs)")
+    parser.add_argument('--plan', default=None, help="Decode plan (.json) saved from the decoder tabs, applied on top of the script's answers")
+    parser.add_argument('--groups', default=None, help="Derived-group classifiers (.json list of {source, target, labels, ranges}); default: IncomeGroup from IncomeRange")
+    parser.add_argument('--chunksize', type=int, default=None, help="Stream each file in chunks of this many rows to bound memory")
+    parser.add_argument('--format', default='CSV', choices=list(EXPORT_FORMATS), help="Output file format (default: CSV)")
+    parser.add_argument('--trace', default=None, help="Record every pipeline step and write a JSON trace (Trace Event Format) to this file")
+    args = parser.parse_args(argv)
+
+    enable_copy_on_write()
+    tracer = Tracer() if args.trace else None
+    with activate(tracer):
+        status = run_pipeline(args.input_dir, args.script, args.output, max_workers=args.workers, chunksize=args.chunksize, plan_path=args.plan, export_format=args.format, groups_path=args.groups)
+    if tracer is not None:
+        with open(args.trace, 'w', encoding='utf-8') as f:
+            f.write(tracer.to_json())
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
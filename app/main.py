@@ -1,33 +1,48 @@
 import streamlit as st
-import numpy as np
 from utils.component import page_style
 from utils.security import check_password
-from module.data_cleaner_module.data_cleaner import IVR_Data_Cleaner
-from module.data_cleaner_module.columns_definer import Questionnaire_Definer
-from module.data_cleaner_module.rows_definer import Keypress_Decoder
-from module.data_cleaner_module.dataframe_decoder import Questionnaire_Keypress_Decoder
 
-page_style()
-# Ensure to initialize the class
-ivr_cleaner = IVR_Data_Cleaner()
-
-# Ensure to initialize the class
-questionnaire_definer = Questionnaire_Definer()
-
-keypress_decoder = Keypress_Decoder()
-
-questionnaire_keypress_decoder = Questionnaire_Keypress_Decoder()
-
-tab1, tab2, tab3, tab4 = st.tabs(["Data_Processor", "Columns_Definer", "Rows_Definer", "Dataframe_Decoder"])
-
-with tab1:
-    ivr_cleaner.run()
-
-with tab2:
-    questionnaire_definer.run2()
-
-with tab3:
-    keypress_decoder.run3()
-
-with tab4:
-    questionnaire_keypress_decoder.run4()
\ No newline at end of file
+# Each stage imports its module on first use, and only the selected stage runs on a rerun.
+def data_processor():
+    from module.data_cleaner_module.data_cleaner import IVR_Data_Cleaner
+    IVR_Data_Cleaner().run()
+
+def columns_definer():
+    from module.data_cleaner_module.columns_definer import Questionnaire_Definer
+    Questionnaire_Definer().run2()
+
+def rows_definer():
+    from module.data_cleaner_module.rows_definer import Keypress_Decoder
+    Keypress_Decoder().run3()
+
+def dataframe_decoder():
+    from module.data_cleaner_module.dataframe_decoder import Questionnaire_Keypress_Decoder
+    Questionnaire_Keypress_Decoder().run4()
+
+def run_stage(stage):
+    """
+    Runs the selected stage under the run's tracer, then shows the memory and trace panels.
+    Their modules (pandas, pyarrow) are imported here, once a stage has been chosen.
+    """
+    from utils.data_components import memory_usage_panel, start_traced_run, trace_panel
+    from module.data_cleaner_module.data_cleaning_utils.session_store import enable_copy_on_write
+    from module.data_cleaner_module.data_cleaning_utils.instrumentation import activate
+
+    enable_copy_on_write()
+    with activate(start_traced_run()):
+        stage.run()
+    memory_usage_panel()
+    trace_panel()
+
+# Streamlit runs this script as __main__; the pool workers of process_files_parallel import
+# it again as __mp_main__ when they start, and must not render the app.
+if __name__ == '__main__':
+    page_style()
+
+    stage = st.navigation([
+        st.Page(data_processor, title="Data_Processor", default=True),
+        st.Page(columns_definer, title="Columns_Definer"),
+        st.Page(rows_definer, title="Rows_Definer"),
+        st.Page(dataframe_decoder, title="Dataframe_Decoder")
+    ])
+    run_stage(stage)
@@ -1,42 +1,49 @@
 import streamlit as st
 from PIL import Image
-import json
-from module.data_cleaner_module.data_cleaning_utils.columns_definer_utils import parse_questions_and_answers, parse_text_to_json, rename_columns
+from module.data_cleaner_module.data_cleaning_utils.columns_definer_utils import rename_columns
+from module.data_cleaner_module.data_cleaning_utils.questionnaire_schema import compile_schema
+from module.data_cleaner_module.data_cleaning_utils.export_utils import IMPORT_EXTENSIONS, read_dataframe
+from module.data_cleaner_module.data_cleaning_utils.instrumentation import traced
+from utils.data_components import get_session_store
 
 class Questionnaire_Definer:
     def __init__(self):
         pass
 
+    @traced(category='page')
     def run2(self):
         st.title('Columns Definer 🍃')
+        store = get_session_store()
         st.markdown("### Upload Script Files (.txt, .json format)")
 
         uploaded_file = st.file_uploader("Choose a txt with formatting or json with flow-mapping file", type=['txt','json'], key='questionnaire_file_uploader')
-        file_parsed = False  # Track if a file has been parsed
+        schema = None
 
         if uploaded_file is not None:
-            file_contents = uploaded_file.getvalue().decode("utf-8")
-
-            if uploaded_file.type == "application/json":
-                try:
-                    json_data = json.loads(file_contents)
-                    parsed_data = parse_questions_and_answers(json_data)
-                    st.session_state['qa_dict'] = parsed_data
-                    st.success("JSON questions and answers parsed successfully.✨")
-                    file_parsed = True
-                except json.JSONDecodeError:
-                    st.error("Error decoding JSON. Please ensure the file is a valid JSON format.")
-            else:  # For text format
-                parsed_data = parse_text_to_json(file_contents)
-                st.session_state['qa_dict'] = parsed_data
-                st.success("Text questions and answers parsed successfully.✨")
-                file_parsed = True
+            is_json = uploaded_file.type == "application/json"
+            try:
+                schema = compile_schema(uploaded_file.getvalue(), is_json=is_json or None)
+                st.session_state['questionnaire_schema'] = schema
+                st.success(f"{'JSON' if is_json else 'Text'} questions and answers parsed successfully.✨")
+            except ValueError:
+                st.error("Error decoding JSON. Please ensure the file is a valid JSON format.")
+        elif st.session_state.get('questionnaire_schema'):
+            schema = st.session_state['questionnaire_schema']
+            st.info("Using the script uploaded in another tab.")
 
         st.markdown("## Rename Columns")
-        if 'cleaned_data' not in st.session_state:
+        cleaned_upload = st.file_uploader("Or load previously exported cleaned data (.parquet, .feather, .csv)", type=IMPORT_EXTENSIONS, key='cleaned_data_uploader')
+        if cleaned_upload is not None and st.session_state.get('cleaned_data_source') != cleaned_upload.file_id:
+            try:
+                store.put('cleaned', read_dataframe(cleaned_upload))
+                st.session_state['cleaned_data_source'] = cleaned_upload.file_id
+            except ValueError as e:
+                st.error(str(e))
+
+        if 'cleaned' not in store:
             st.warning("No cleaned data available for renaming.")
         else:
-            cleaned_data = st.session_state['cleaned_data']
+            cleaned_data = store.get('cleaned')
             column_names_to_display = [col for col in cleaned_data.columns]  # Placeholder for actual column names
 
             new_column_names = []
@@ -45,9 +52,8 @@ class Questionnaire_Definer:
                     default_value = "phonenum"
                 elif idx == len(column_names_to_display) - 1:
                     default_value = "Set"
-                elif file_parsed:
-                    question_key = f"Q{idx}"
-                    default_value = st.session_state['qa_dict'].get(question_key, {}).get('question', default_name)
+                elif schema:
+                    default_value = schema.question_for(idx, default_name)
                 else:
                     default_value = default_name
 
@@ -55,7 +61,6 @@ class Questionnaire_Definer:
                 new_column_names.append(new_name)
 
             if st.button("Apply New Column Names"):
-                updated_df = rename_columns(cleaned_data, new_column_names)
-                st.session_state['renamed_data'] = updated_df
+                updated_df = store.put('renamed', rename_columns(cleaned_data, new_column_names))
                 st.write("DataFrame with Renamed Columns:")
                 st.dataframe(updated_df.head())
\ No newline at end of file
@@ -1,86 +1,183 @@
+import os
+import shutil
+import tempfile
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from module.data_cleaner_module.data_cleaning_utils.data_cleaner_utils import process_file 
+from typing import Any, Dict, List, Tuple
+from module.data_cleaner_module.data_cleaning_utils.data_cleaner_utils import CampaignAccumulator, process_files_parallel
+from module.data_cleaner_module.data_cleaning_utils.result_cache import ProcessedFileCache
+from module.data_cleaner_module.data_cleaning_utils.exclusion_index import DialedNumberIndex
+from module.data_cleaner_module.data_cleaning_utils.export_utils import EXPORT_FORMATS, with_extension
+from module.data_cleaner_module.data_cleaning_utils.instrumentation import traced
+from module.data_cleaner_module.data_cleaning_utils.jobs import Job
+from utils.data_components import collect_job, get_session_store, job_running, lazy_download_button, paginated_dataframe, start_job
+
+MAX_WORKERS = 64  # Upper bound of the worker process input
+
+@st.cache_resource
+def get_result_cache() -> ProcessedFileCache:
+    """
+    Process-wide cache of processed IVR files, shared by every session.
+    Set IVR_RESULT_CACHE_DIR to also persist results on disk across restarts.
+    """
+    return ProcessedFileCache(cache_dir=os.environ.get('IVR_RESULT_CACHE_DIR'))
+
+@st.cache_resource
+def get_dialed_number_index() -> DialedNumberIndex:
+    """
+    Process-wide history of dialed phone numbers, persisted across campaigns.
+    Stored at IVR_DIALED_INDEX_PATH (default: data/dialed_numbers.npy).
+    """
+    return DialedNumberIndex(os.environ.get('IVR_DIALED_INDEX_PATH', os.path.join('data', 'dialed_numbers.npy')))
+
+def spool_uploads(uploaded_files: list) -> Tuple[str, List[Tuple[str, str]]]:
+    """
+    Copies the uploaded files into a new directory under IVR_UPLOAD_SPOOL_DIR (default: the
+    system temp dir), so they can be processed from disk by path.
+
+    Returns:
+    - tuple: (the spool directory, (file name, path) pairs).
+    """
+    spool_dir = tempfile.mkdtemp(prefix='ivr_uploads_', dir=os.environ.get('IVR_UPLOAD_SPOOL_DIR'))
+    files = []
+    for position, uploaded_file in enumerate(uploaded_files):
+        path = os.path.join(spool_dir, f"{position}.csv")
+        uploaded_file.seek(0)
+        with open(path, 'wb') as f:
+            shutil.copyfileobj(uploaded_file, f)
+        files.append((uploaded_file.name, path))
+    return spool_dir, files
+
+def process_uploads(job: Job, spool_dir: str, files: List[Tuple[str, str]], max_workers: int, chunksize: int = None, cache: ProcessedFileCache = None) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Any], List[Dict[str, Any]], List[str]]:
+    """
+    Background job processing the spooled uploads (see spool_uploads) into one campaign.
+    The spool directory is removed when the job ends.
+
+    Reports the files finished and the rows read so far (per chunk in streaming mode) and
+    stops at the next file or chunk once the job is cancelled.
+
+    Returns:
+    - tuple: (cleaned data, deduplicated phone numbers, campaign totals keyed by their session
+             state names, per-file ingestion report rows, error messages of files that failed).
+    """
+    files_done = 0
+    rows_read = {}
+
+    def progress(file_name: str, rows: int, finished: bool) -> None:
+        nonlocal files_done
+        if finished:
+            files_done += 1
+        elif rows is not None:
+            rows_read[file_name] = rows
+        job.report(files_done / len(files), f"{files_done} of {len(files)} files processed, {sum(rows_read.values()):,} rows read")
+
+    job.report(0.0, f"Processing {len(files)} files")
+    try:
+        file_results = process_files_parallel(files, max_workers=max_workers, chunksize=chunksize, cache=cache, progress=progress, cancel_event=job.cancel_event)
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+
+    campaign = CampaignAccumulator()
+    ingest_report, errors = [], []
+    for file_name, result, error in file_results:
+        if error:
+            errors.append(error)
+            continue
+
+        df_complete, phonenum_list, total_calls_made, total_of_pickups = result
+        rejected_phones = df_complete.attrs.get('rejected_phones', {})
+        ingest_report.append({
+            "File": file_name,
+            "CSV parser": df_complete.attrs.get('ingest_engine'),
+            "Rejected phone rows": rejected_phones.get('count', 0),
+            "Sample of rejected values": ", ".join(rejected_phones.get('sample', []))
+        })
+
+        campaign.add(df_complete, phonenum_list, total_calls_made, total_of_pickups)
+
+    job.report(1.0, "Combining the files")
+    campaign.compact()
+    totals = {
+        "total_calls_made": campaign.total_calls_made,
+        "total_pickups": campaign.total_pickups,
+        "total_CRs": campaign.total_CRs,
+        "total_phonenum": campaign.total_phonenum,
+        "file_count": campaign.file_count,
+        "pick_up_rate_percentage": campaign.pick_up_rate_percentage
+    }
+    return campaign.merged(), campaign.phonenum(), totals, ingest_report, errors
 
 class IVR_Data_Cleaner:
     def __init__(self):
         pass
 
+    @traced(category='page')
     def run(self):
         st.title('Data Processor 🔮')
+        store = get_session_store()
 
         if 'processed' not in st.session_state:
             st.session_state['processed'] = False
             st.session_state['total_calls_made'] = 0
             st.session_state['total_pickups'] = 0
             st.session_state['total_CRs'] = 0
-
-        if 'df_merge' not in st.session_state:
-            st.session_state['df_merge'] = pd.DataFrame()
-        
-        if 'phonenum_combined' not in st.session_state:
-            st.session_state['phonenum_combined'] = pd.DataFrame()
-        
-        if 'processed' not in st.session_state:
-            st.session_state['processed'] = False
-            st.session_state['all_data'] = []
-            st.session_state['all_phonenum'] = []
-            st.session_state['total_calls_made'] = 0
-            st.session_state['total_pickups'] = 0
+            st.session_state['total_phonenum'] = 0
             st.session_state['file_count'] = 0
 
         st.markdown("### Upload IVR Files (.csv format)")
 
         uploaded_files = st.file_uploader("Choose CSV files", accept_multiple_files=True)
+
+        parallel = st.checkbox("Process files in parallel", value=True)
+        max_workers = st.number_input("Worker processes", min_value=1, max_value=MAX_WORKERS, value=min(os.cpu_count() or 1, MAX_WORKERS), disabled=not parallel)
+        streaming = st.checkbox("Streaming mode for very large files (bounded memory)", value=False)
+        chunksize = st.number_input("Rows per chunk", min_value=10_000, max_value=5_000_000, value=200_000, step=50_000, disabled=not streaming)
+        use_cache = st.checkbox("Reuse results of files processed before", value=True)
         
-        if st.button('Process'):
+        if st.button('Process', disabled=job_running('processing_job')):
             if not uploaded_files:
                 st.error("No files uploaded. Please upload a CSV file to process.")
                 return
 
-            with st.spinner("Processing the files..."):
-                st.session_state['all_data'] = []
-                st.session_state['all_phonenum'] = []
-                st.session_state['total_calls_made'] = 0
-                st.session_state['total_pickups'] = 0
-                st.session_state['file_count'] = 0
-                st.session_state['processed'] = True
-
-                for uploaded_file in uploaded_files:
-                    df_complete, phonenum_list, total_calls_made, total_of_pickups, df_merge ,df_list = process_file(uploaded_file)
-
-                    st.session_state['all_data'].append(df_complete)
-                    st.session_state['all_phonenum'].append(phonenum_list)
-                    st.session_state['total_calls_made'] += total_calls_made
-                    st.session_state['total_pickups'] += total_of_pickups
-                    st.session_state['file_count'] += 1
-                    st.session_state['total_CRs'] += len(df_complete)
-                    st.session_state['df_merge'] = pd.concat([st.session_state['df_merge'], df_complete], ignore_index=True)
-                    st.session_state['phonenum_combined'] = pd.concat([st.session_state['phonenum_combined']], ignore_index=True).drop_duplicates()
-                
-                if st.session_state['all_data']:
-                    st.session_state['df_merge'] = pd.concat(st.session_state['all_data'], ignore_index=True)
-                else:
-                    st.session_state['df_merge'] = pd.DataFrame()
+            spool_dir, files = spool_uploads(uploaded_files)
+            start_job(
+                'processing_job', "Processing the files", process_uploads, spool_dir, files,
+                max_workers=int(max_workers) if parallel else 1,
+                chunksize=int(chunksize) if streaming else None,
+                cache=get_result_cache() if use_cache else None
+            )
+
+        job = collect_job('processing_job')
+        if job is not None:
+            # The store is the only owner of the frames; session state keeps the totals.
+            cleaned_data, phonenum_data, totals, ingest_report, errors = job.result
+            for error in errors:
+                st.error(error)
 
-                if st.session_state['all_phonenum']:
-                    st.session_state['phonenum_combined'] = pd.concat(st.session_state['all_phonenum'], ignore_index=True).drop_duplicates()
-                else:
-                    st.session_state['phonenum_combined'] = pd.DataFrame()
+            st.session_state['ingest_report'] = ingest_report
+            st.session_state.update(totals)
+            st.session_state['processed'] = totals['file_count'] > 0
+            if st.session_state['processed']:
+                store.put('cleaned', cleaned_data)
+                store.put('phonenum', phonenum_data)
+            del job, cleaned_data, phonenum_data
 
-                st.session_state['processed'] = True
+        if st.session_state['processed'] and not ('cleaned' in store and 'phonenum' in store):
+            st.session_state['processed'] = False
+            st.info("The processed data was released after being idle. Please process the files again.")
 
         if st.session_state['processed']:
-            combined_data = pd.concat(st.session_state['all_data'], axis='index', ignore_index=True)
-            combined_phonenum = pd.concat(st.session_state['all_phonenum'], axis=0).drop_duplicates()
-            combined_phonenum.rename(columns={'PhoneNo': 'phonenum'}, inplace=True)
+            combined_data = store.get('cleaned')
 
             st.session_state['total_CRs'] = combined_data.shape[0]
-            st.session_state['pick_up_rate_percentage'] = (st.session_state['total_pickups'] / st.session_state['total_calls_made']) * 100 if st.session_state['total_calls_made'] > 0 else 0
             # st.session_state['cr_rate_percentage'] = (st.session_state['total_CRs'] / st.session_state['total_pickups']) * 100 if st.session_state['total_pickups'] > 0 else 0
                 
             st.success("Files have been processed successfully.✨")
+
+            if st.session_state.get('ingest_report'):
+                with st.expander("Show per-file ingestion report"):
+                    st.dataframe(pd.DataFrame(st.session_state['ingest_report']), hide_index=True)
         
             st.markdown("### IVR Campaign Basic Statistics:")
             data = {
@@ -98,30 +195,23 @@ class IVR_Data_Cleaner:
 
             st.markdown("### Cleaned Data Preview:")
             st.dataframe(combined_data.head())
+            st.caption("Phone numbers are exported in international format: a local number such as 012-345 6789 is written as 60123456789.")
+
+            export_format = st.radio("Download format", list(EXPORT_FORMATS), horizontal=True, key='cleaner_export_format')
 
             formatted_date = datetime.now().strftime("%Y%m%d")
             default_filename = f'IVR_Cleaned_Data_v{formatted_date}.csv'
             output_filename = st.text_input("Edit the filename for download", value=default_filename)
-
-            if not output_filename.lower().endswith('.csv'):
-                output_filename += '.csv'
+            output_filename = with_extension(output_filename, export_format)
             
-            st.session_state['cleaned_data'] = combined_data
-            data_as_csv = combined_data.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="Download Cleaned Data as CSV",
-                data=data_as_csv,
-                file_name=output_filename,
-                mime='text/csv'
-            )
+            lazy_download_button("Cleaned Data", combined_data, export_format, output_filename, key='download_cleaned_data')
     
-            phonenum_combined = combined_data
-            st.write(phonenum_combined)
-            dup = phonenum_combined.duplicated().sum()
-            phonenum_combined_cleaned = phonenum_combined.drop_duplicates()
-        
+            # Already deduplicated int64 numbers; the counts come from the running totals
+            phonenum_combined = store.get('phonenum')
+            dup = st.session_state['total_phonenum'] - len(phonenum_combined)
+
             st.markdown("### Preview of Phone Numbers to be Excluded in the Next Sampling:")
-            st.dataframe(phonenum_combined_cleaned.head())
+            paginated_dataframe(phonenum_combined, key='phonenum_preview')
 
             phone_data = {
                 "Metric": [
@@ -130,9 +220,9 @@ class IVR_Data_Cleaner:
                     "Total numbers after dropping duplicate numbers"
                 ],
                 "Count": [
-                    f"{phonenum_combined.shape[0]}",
+                    f"{st.session_state['total_phonenum']}",
                     f"{dup}",
-                    f"{phonenum_combined_cleaned.shape[0]}"
+                    f"{phonenum_combined.shape[0]}"
                 ]
             }
             df_phone_stats = pd.DataFrame(phone_data)
@@ -142,16 +232,31 @@ class IVR_Data_Cleaner:
             formatted_date = datetime.now().strftime("%Y%m%d")
             default_filename_phonenum = f'IVR_Dialed_Phonenum_v{formatted_date}.csv'
             output_filename_phonenum = st.text_input("Edit the filename for download", value=default_filename_phonenum)
+            output_filename_phonenum = with_extension(output_filename_phonenum, export_format)
 
-            if not output_filename_phonenum.lower().endswith('.csv'):
-                output_filename_phonenum += '.csv'
+            lazy_download_button("Dialed Phone Numbers", phonenum_combined, export_format, output_filename_phonenum, key='download_dialed_phonenum')
 
-            phonenum_data_as_csv = phonenum_combined.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="Download Dialed Phone Numbers as CSV",
-                data=phonenum_data_as_csv,
-                file_name=output_filename_phonenum,
-                mime='text/csv'
-            )
+            st.markdown("### Dialed Number History Across Campaigns:")
+            dialed_index = get_dialed_number_index()
+            batch_phonenum = phonenum_combined['phonenum']
+            already_dialed = int(dialed_index.contains(batch_phonenum).sum())
+
+            history_data = {
+                "Metric": [
+                    "Total numbers in the dialed-number history",
+                    "Numbers in this batch already dialed in previous campaigns"
+                ],
+                "Count": [
+                    f"{len(dialed_index):,}",
+                    f"{already_dialed:,}"
+                ]
+            }
+            df_history_stats = pd.DataFrame(history_data)
+            df_history_stats.index = df_history_stats.index + 1
+            st.table(df_history_stats)
+
+            if st.button("Add this batch to the dialed-number history"):
+                added = dialed_index.add(batch_phonenum)
+                st.success(f"{added:,} new phone numbers added to the dialed-number history.✨")
 
             st.write("To continue to the Questionnaire Definition, please navigate to the 'Questionairre-Definer & Keypresses-Decoder🎉' app.")
\ No newline at end of file
@@ -3,6 +3,7 @@ import json
 import streamlit as st
 import pandas as pd
 from typing import Dict, Any, List, Optional, Tuple
+from module.data_cleaner_module.data_cleaning_utils.instrumentation import traced
 
 def parse_questions_and_answers(json_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
     """
@@ -53,6 +54,7 @@ def parse_text_to_json(text_content: str) -> Dict[str, Dict[str, Any]]:
 
     return data
 
+@traced()
 def rename_columns(df: pd.DataFrame, new_column_names: List[str]) -> pd.DataFrame:
     """
     Renames dataframe columns based on a list of new column names.
@@ -102,6 +104,7 @@ def flatten_json_structure(flow_no_mappings: Dict[str, Any]) -> Dict[str, str]:
         return {}
     return {k: v for question in flow_no_mappings.values() for k, v in question["answers"].items()}
 
+@traced()
 def drop_duplicates_from_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """
     Drops duplicate rows from the DataFrame.
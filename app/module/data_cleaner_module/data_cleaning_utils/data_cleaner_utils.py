@@ -1,7 +1,36 @@
+import csv
+import io
+import queue
+import threading
+import multiprocessing
 import pandas as pd
 import numpy as np
-from typing import List, Tuple
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from module.data_cleaner_module.data_cleaning_utils.result_cache import ProcessedFileCache, content_hash
+from module.data_cleaner_module.data_cleaning_utils.instrumentation import Tracer, activate, active_tracer, traced
+from module.data_cleaner_module.data_cleaning_utils.jobs import JobCancelled
+from module.data_cleaner_module.data_cleaning_utils.session_store import enable_copy_on_write
 
+DEFAULT_COUNTRY_CODE = '60'  # Replaces the leading trunk 0 of local numbers
+MIN_PHONE_DIGITS = 8
+MAX_PHONE_DIGITS = 15  # E.164 maximum
+REJECTED_PHONE_SAMPLE = 20  # Rejected values kept in the per-file report
+MISSING_PHONE_TEXT = '<empty>'  # How a missing PhoneNo cell is shown in that report
+
+SNIFF_BYTES = 64 * 1024  # Prefix size used to sniff the layout of an IVR export
+LEGACY_MAX_COLUMNS = 100  # Placeholder column count used by the python-engine path
+PROGRESS_POLL_SECONDS = 0.2  # How often process_files_parallel relays worker progress and checks for cancellation
+# Pool workers are never forked from the caller: process_files_parallel runs on Streamlit job
+# threads, and forking a threaded process can copy locks held by other threads
+POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# (progress queue, cancel event) of a pool worker started by process_files_parallel with progress tracking
+_worker_progress = None
+
+@traced()
 def merger(df_list: List[pd.DataFrame], phonenum_list: List[pd.DataFrame]) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
     Concatenates lists of DataFrames and renames a column.
@@ -28,7 +57,200 @@ def merger(df_list: List[pd.DataFrame], phonenum_list: List[pd.DataFrame]) -> Tu
 
     return df_merge, phonenum_combined
 
-def process_file(uploaded_file: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, int, int, pd.DataFrame]:
+@traced()
+def normalize_phone_numbers(phones: pd.Series, country_code: str = DEFAULT_COUNTRY_CODE) -> Tuple[pd.Series, pd.Series]:
+    """
+    Normalises raw phone numbers to a compact int64 representation.
+
+    Plain digit strings without a leading 0 (the common case) are converted directly.
+    Everything else has spaces, dashes, dots and brackets stripped, a leading '+' or '00'
+    removed and a leading trunk '0' replaced by the country code. Values that are still
+    not purely digits, or whose length is outside MIN_PHONE_DIGITS..MAX_PHONE_DIGITS, are rejected.
+    Local numbers therefore leave the cleaner in international form: '012-345 6789' becomes
+    60123456789 with the default country code.
+
+    Parameters:
+    - phones (pd.Series): Raw phone numbers (strings or integers).
+    - country_code (str): Country calling code used for numbers written in local format.
+
+    Returns:
+    - A tuple containing:
+        - phone_numbers: An int64 Series of the valid numbers, keeping their original index.
+        - rejected: The raw values that could not be normalised, with their original index.
+    """
+    if phones.dtype.kind in 'iu':
+        # Integers need no cleaning; the length check becomes a range check
+        valid = phones.between(10 ** (MIN_PHONE_DIGITS - 1), 10 ** MAX_PHONE_DIGITS - 1).to_numpy(dtype=bool)
+        return phones[valid].astype(np.int64), phones[~valid]
+
+    text = phones.where(phones.isna(), phones.astype(str)).str.strip()
+
+    needs_cleaning = ~(text.str.isdigit().eq(True) & ~text.str.startswith('0', na=False))
+    if needs_cleaning.any():
+        cleaned = text[needs_cleaning].str.replace(r'[\s\-().]', '', regex=True)
+        cleaned = cleaned.str.replace(r'^(\+|00)', '', regex=True)
+        cleaned = cleaned.where(~cleaned.str.startswith('0', na=False), country_code + cleaned.str[1:])
+        text = text.copy()
+        text[needs_cleaning] = cleaned
+
+    valid = (text.str.isdigit().eq(True) & text.str.len().between(MIN_PHONE_DIGITS, MAX_PHONE_DIGITS)).to_numpy(dtype=bool)
+    phone_numbers = text[valid].astype(np.int64)
+    return phone_numbers, phones[~valid]
+
+def _rejected_phone_report(rejected: pd.Series, count: int) -> dict:
+    """
+    Summarises rejected phone values for df_complete.attrs['rejected_phones'].
+    Cells the CSV parser read as missing (empty, 'N/A', ...) are reported as '<empty>'.
+    """
+    return {'count': int(count), 'sample': [MISSING_PHONE_TEXT if pd.isna(val) else str(val) for val in rejected.head(REJECTED_PHONE_SAMPLE)]}
+
+@traced()
+def keypress_columns_to_categorical(df_complete: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts every column except the phone number column (the first one) to a pandas categorical.
+
+    Keypress columns hold a handful of distinct values such as 'FlowNo_3=2' repeated over
+    millions of rows, so storing them as categories cuts memory and turns decoding,
+    dedupe and value_counts into operations on small integer codes.
+
+    Parameters:
+    - df_complete (pd.DataFrame): The processed DataFrame, phone numbers first.
+
+    Returns:
+    - pd.DataFrame: The same data with categorical keypress columns.
+    """
+    categorical_columns = {col: 'category' for col in df_complete.columns[1:] if not isinstance(df_complete[col].dtype, pd.CategoricalDtype)}
+    return df_complete.astype(categorical_columns) if categorical_columns else df_complete
+
+@traced()
+def concat_categorical(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenates DataFrames vertically while keeping categorical columns categorical.
+
+    pd.concat falls back to object dtype when the same column has different categories
+    in different frames, so the categories are unioned first.
+
+    Parameters:
+    - frames (list of pd.DataFrame): Frames with the same columns, e.g. the df_complete of several files.
+
+    Returns:
+    - pd.DataFrame: The concatenated DataFrame with a fresh RangeIndex.
+    """
+    if not frames:
+        return pd.DataFrame()
+
+    unified_dtypes = {}
+    for col in frames[0].columns:
+        dtypes = [frame[col].dtype for frame in frames if col in frame.columns]
+        if len(dtypes) > 1 and all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes):
+            categories = pd.api.types.union_categoricals([pd.Categorical([], categories=dtype.categories) for dtype in dtypes]).categories
+            unified_dtypes[col] = pd.CategoricalDtype(categories)
+
+    aligned = [frame.astype({col: dtype for col, dtype in unified_dtypes.items() if col in frame.columns}) for frame in frames] if unified_dtypes else frames
+    return pd.concat(aligned, ignore_index=True)
+
+def _rewind(uploaded_file: Any) -> None:
+    """
+    Moves a file-like object back to its first byte so it can be read again.
+    Paths are left untouched.
+    """
+    if hasattr(uploaded_file, 'seek'):
+        uploaded_file.seek(0)
+
+def sniff_csv_layout(uploaded_file: Any, sample_bytes: int = SNIFF_BYTES) -> Tuple[int, bool]:
+    """
+    Inspects a small prefix of an IVR export to find the real column count.
+
+    The first line of an export is a report title and is skipped, exactly like the
+    full read does. The remaining complete lines of the prefix are tokenised with the
+    csv module to measure how many fields each row carries.
+
+    Parameters:
+    - uploaded_file: A path or a file-like object supporting read and seek.
+    - sample_bytes (int): Number of bytes to inspect from the start of the file.
+
+    Returns:
+    - A tuple containing:
+        - width: The widest row seen in the prefix (0 if nothing could be sniffed).
+        - rectangular: True if every sniffed row (header included) has the same width.
+    """
+    if hasattr(uploaded_file, 'read'):
+        _rewind(uploaded_file)
+        prefix = uploaded_file.read(sample_bytes)
+        at_eof = len(prefix) < sample_bytes
+        _rewind(uploaded_file)
+    else:
+        with open(uploaded_file, 'rb') as f:
+            prefix = f.read(sample_bytes)
+            at_eof = len(prefix) < sample_bytes
+
+    if isinstance(prefix, bytes):
+        prefix = prefix.decode('utf-8', errors='replace')
+
+    lines = prefix.splitlines()
+    if not at_eof:
+        lines = lines[:-1]  # The last line of the prefix may be cut in half
+    widths = [len(row) for row in csv.reader(lines[1:]) if row]
+
+    if not widths:
+        return 0, False
+    return max(widths), len(set(widths)) == 1
+
+def _read_csv_pyarrow(uploaded_file: Any, width: int) -> pd.DataFrame:
+    """
+    Parses a rectangular IVR export with pyarrow, keeping every column as nullable strings
+    so the result matches what the pandas engines produce with dtype=str.
+    """
+    column_names = [str(i) for i in range(width)]
+    read_options = pa_csv.ReadOptions(skip_rows=1, column_names=column_names)
+    convert_options = pa_csv.ConvertOptions(
+        column_types={name: pa.string() for name in column_names},
+        strings_can_be_null=True
+    )
+    df = pa_csv.read_csv(uploaded_file, read_options=read_options, convert_options=convert_options).to_pandas()
+    df.columns = range(width)
+    return df.fillna(np.nan)
+
+@traced()
+def read_ivr_csv(uploaded_file: Any, fast: bool = True) -> Tuple[pd.DataFrame, str]:
+    """
+    Reads a raw IVR export into a DataFrame with positional column names.
+
+    The fast path sniffs the real column count from a small prefix and parses the file
+    with the pyarrow engine (rectangular files only) or the C engine, using only the
+    real columns and keeping every value as a string. If a row turns out to be wider
+    than the sniffed width, the file is truly ragged and the slower python engine with
+    placeholder columns is used instead.
+
+    Parameters:
+    - uploaded_file: A path or a file-like object supporting read and seek.
+    - fast (bool): Whether to try the sniffed C/pyarrow path before the python engine.
+
+    Returns:
+    - A tuple containing:
+        - df: The parsed DataFrame, with the header row kept as row 0.
+        - engine: The parser that produced the frame ('pyarrow', 'c' or 'python').
+    """
+    if fast:
+        width, rectangular = sniff_csv_layout(uploaded_file)
+        engines = ['pyarrow'] if rectangular else []
+        engines.append('c')
+
+        for engine in engines if width else []:
+            try:
+                if engine == 'pyarrow':
+                    df = _read_csv_pyarrow(uploaded_file, width)
+                else:
+                    df = pd.read_csv(uploaded_file, skiprows=1, names=range(width), dtype=str, engine=engine)
+                return df, engine
+            except (pd.errors.ParserError, ValueError):
+                _rewind(uploaded_file)
+
+    df = pd.read_csv(uploaded_file, skiprows=1, names=range(LEGACY_MAX_COLUMNS), engine='python')
+    return df, 'python'
+
+@traced()
+def process_file(uploaded_file: pd.DataFrame, fast: bool = True, normalize_phone: bool = True) -> Tuple[pd.DataFrame, pd.DataFrame, int, int, pd.DataFrame]:
     """
     Process the uploaded CSV file to extract and transform phone number data
     and user response data for analysis.
@@ -45,6 +267,11 @@ def process_file(uploaded_file: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFram
     Parameters:
     - uploaded_file: A file-like object representing the uploaded CSV file.
                      This object must support file-like operations such as read.
+    - fast (bool): Whether to use the sniffed C/pyarrow ingestion path (see read_ivr_csv).
+                   The parser that was used is recorded in df_complete.attrs['ingest_engine'].
+    - normalize_phone (bool): Whether to normalise PhoneNo to int64 (see normalize_phone_numbers) before
+                              deduplicating. Rejected rows are dropped and summarised in
+                              df_complete.attrs['rejected_phones'].
 
     Returns:
     - A tuple containing:
@@ -61,14 +288,20 @@ def process_file(uploaded_file: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFram
     total_pickup = []
     total_of_pickups = []
 
-    df = pd.read_csv(uploaded_file, skiprows=1, names=range(100), engine='python')
+    df, ingest_engine = read_ivr_csv(uploaded_file, fast=fast)
 
     df.dropna(axis='columns', how='all', inplace=True)
 
     df.columns = df.iloc[0]
 
-    df_phonenum = df[['PhoneNo']]
-    df_response = df.loc[:, 'UserKeyPress':]
+    if normalize_phone:
+        phone_numbers, rejected_phones = normalize_phone_numbers(df['PhoneNo'].iloc[1:])  # Row 0 is the header row
+        df_phonenum = phone_numbers.to_frame('PhoneNo')
+        df_response = df.loc[phone_numbers.index, 'UserKeyPress':]
+    else:
+        rejected_phones = pd.Series(dtype=object)
+        df_phonenum = df[['PhoneNo']]
+        df_response = df.loc[:, 'UserKeyPress':]
     df_results = pd.concat([df_phonenum, df_response], axis='columns')
     
     df_results.drop_duplicates(subset=['PhoneNo'], inplace=True)
@@ -91,6 +324,10 @@ def process_file(uploaded_file: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFram
 
     df_complete = df_complete.loc[(df_complete.iloc[:, 2].str.len() == 10)]
 
+    df_complete = keypress_columns_to_categorical(df_complete)
+    df_complete.attrs['ingest_engine'] = ingest_engine
+    df_complete.attrs['rejected_phones'] = _rejected_phone_report(rejected_phones, len(rejected_phones))
+
     df_list.append(df_complete)
     
     df_list = pd.DataFrame
@@ -98,4 +335,417 @@ def process_file(uploaded_file: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFram
     df_merge, phonenum_combined = merger([df_complete], [phonenum_list])  # Adjusted to pass lists of DataFrames
 
     # Correct the return statement to include all expected return values
-    return df_complete, phonenum_combined, total_calls_made, total_of_pickups, df_merge, df_list
\ No newline at end of file
+    return df_complete, phonenum_combined, total_calls_made, total_of_pickups, df_merge, df_list
+
+def _iter_ivr_chunks(uploaded_file: Any, chunksize: int, engine: str, width: int):
+    """
+    Yields positional-column chunks of a raw IVR export, the header row being row 0 of the first chunk.
+    """
+    if engine == 'c':
+        return pd.read_csv(uploaded_file, skiprows=1, names=range(width), dtype=str, engine='c', chunksize=chunksize)
+    return pd.read_csv(uploaded_file, skiprows=1, names=range(LEGACY_MAX_COLUMNS), dtype=str, engine='python', chunksize=chunksize)
+
+def _merge_sorted(numbers: np.ndarray, positions: np.ndarray, new_numbers: np.ndarray) -> np.ndarray:
+    """
+    Inserts sorted new_numbers into the sorted array numbers at their (non-decreasing)
+    searchsorted positions; np.insert would sort the positions again.
+    """
+    merged = np.empty(len(numbers) + len(new_numbers), dtype=numbers.dtype)
+    slots = positions + np.arange(len(new_numbers))
+    kept = np.ones(len(merged), dtype=bool)
+    kept[slots] = False
+    merged[slots] = new_numbers
+    merged[kept] = numbers
+    return merged
+
+class _SeenPhones:
+    """
+    Phone numbers already seen by _stream_ivr_chunks: a sorted int64 array for normalised
+    numbers, or a set for raw strings.
+    """
+    def __init__(self):
+        self.numbers = np.empty(0, dtype=np.int64)
+        self.strings = set()
+
+    def __len__(self) -> int:
+        return len(self.numbers) + len(self.strings)
+
+    def first_seen(self, phones: pd.Series) -> np.ndarray:
+        """
+        Returns a mask of the first occurrence of every phone number not seen in earlier chunks, and records them.
+        """
+        if phones.dtype.kind in 'iu':
+            # Only the chunk is sorted. Its sorted keys give the repeats within the chunk, one
+            # search gives both the numbers seen before and where the new ones go, and those
+            # are merged into the sorted array in a single linear pass.
+            keys = phones.to_numpy(dtype=np.int64)
+            order = np.argsort(keys, kind='stable')
+            sorted_keys = keys[order]
+            positions = np.searchsorted(self.numbers, sorted_keys)
+            new = np.ones(len(keys), dtype=bool)
+            new[1:] = sorted_keys[1:] != sorted_keys[:-1]
+            if len(self.numbers):
+                new &= self.numbers[np.minimum(positions, len(self.numbers) - 1)] != sorted_keys
+            self.numbers = _merge_sorted(self.numbers, positions[new], sorted_keys[new])
+            mask = np.empty(len(keys), dtype=bool)
+            mask[order] = new
+        else:
+            mask = ~phones.duplicated().to_numpy()
+            keys = phones.fillna('')
+            mask &= np.fromiter((phone not in self.strings for phone in keys), dtype=bool, count=len(keys))
+            self.strings.update(keys[mask])
+        return mask
+
+def _stream_ivr_chunks(uploaded_file: Any, chunksize: int, engine: str, width: int, normalize_phone: bool = True, on_chunk: Optional[Callable[[int], None]] = None) -> Tuple[pd.DataFrame, int, dict]:
+    """
+    Single streaming pass used by process_file_chunked.
+
+    Keeps only the first occurrence of every PhoneNo and, of those, only the rows with a
+    recorded UserKeyPress. Those rows are the only ones that can end up in df_complete,
+    so everything else is discarded as soon as its chunk has been counted.
+
+    Returns the retained rows, restricted to PhoneNo and the UserKeyPress-onward columns
+    that are not empty across the whole file, the total number of calls made, and the
+    rejected phone values (a bounded sample when normalize_phone is set). on_chunk is called
+    with the number of rows read so far after every chunk.
+    """
+    seen_phones = _SeenPhones()
+    rows_read = 0
+    kept_chunks = []
+    rejected_count = 0
+    rejected_sample = []
+    result_columns = None
+    column_has_data = None
+
+    for chunk in _iter_ivr_chunks(uploaded_file, chunksize, engine, width):
+        rows_read += len(chunk)
+        if result_columns is None:
+            header = chunk.iloc[0]
+            phone_pos = header[header == 'PhoneNo'].index[0]
+            keypress_pos = header[header == 'UserKeyPress'].index[0]
+            result_columns = [phone_pos] + [col for col in chunk.columns if col >= keypress_pos]
+            # Named columns count as data, as in process_file's dropna over the header row
+            column_has_data = header[result_columns].notna().to_numpy(copy=True)
+            if normalize_phone:
+                chunk = chunk.iloc[1:]  # The header row is not a call
+
+        chunk = chunk[result_columns]
+        column_has_data |= chunk.notna().any().to_numpy()
+
+        if normalize_phone:
+            phone_numbers, rejected = normalize_phone_numbers(chunk[phone_pos])
+            rejected_count += len(rejected)
+            rejected_sample += rejected.head(REJECTED_PHONE_SAMPLE - len(rejected_sample)).tolist()
+            chunk = chunk.loc[phone_numbers.index].copy(deep=False)
+            chunk[phone_pos] = phone_numbers
+
+        first_seen = seen_phones.first_seen(chunk[phone_pos])
+        kept = chunk[first_seen & chunk[result_columns[1]].notna().to_numpy()]
+        if not kept.empty:
+            kept_chunks.append(kept)
+        if on_chunk is not None:
+            on_chunk(rows_read)
+
+    report = _rejected_phone_report(pd.Series(rejected_sample, dtype=object), rejected_count)
+    if not kept_chunks:
+        return pd.DataFrame(columns=result_columns or []), len(seen_phones), report
+
+    df_kept = pd.concat(kept_chunks)
+    return df_kept.loc[:, column_has_data], len(seen_phones), report
+
+@traced()
+def process_file_chunked(uploaded_file: Any, chunksize: int = 200_000, normalize_phone: bool = True, on_chunk: Optional[Callable[[int], None]] = None) -> Tuple[pd.DataFrame, pd.DataFrame, int, int]:
+    """
+    Bounded-memory variant of process_file for very large IVR exports.
+
+    The export is read in chunks of `chunksize` rows. PhoneNo is deduplicated across chunks,
+    calls and pickups are counted incrementally, and only first-occurrence rows with a user
+    key press are retained between chunks, so peak memory depends on the chunk size and the
+    number of pickups rather than on the size of the file. The outputs match process_file.
+
+    Parameters:
+    - uploaded_file: A path or a file-like object supporting read and seek.
+    - chunksize (int): Number of rows parsed per chunk.
+    - normalize_phone (bool): Whether to normalise PhoneNo to int64, as in process_file.
+    - on_chunk (callable, optional): Called with the rows read so far after every chunk; may raise
+                                     (e.g. JobCancelled) to stop processing.
+
+    Returns:
+    - A tuple containing:
+        - df_complete: The processed DataFrame of calls with complete information.
+        - phonenum_combined: A DataFrame of phone numbers that have at least one user key press.
+        - total_calls_made: The number of distinct phone numbers in the file.
+        - total_of_pickups: The number of distinct phone numbers with a complete response.
+    """
+    width, _ = sniff_csv_layout(uploaded_file)
+    engines = ['c', 'python'] if width else ['python']
+
+    for engine in engines:
+        try:
+            df_kept, total_calls_made, rejected_report = _stream_ivr_chunks(uploaded_file, chunksize, engine, width, normalize_phone, on_chunk)
+            break
+        except pd.errors.ParserError:
+            if engine == 'python':
+                raise
+            _rewind(uploaded_file)  # A row is wider than the sniffed width; restart with the python engine
+
+    phonenum_list = df_kept.iloc[:, [0]].set_axis(['PhoneNo'], axis='columns')
+
+    df_complete = df_kept.dropna(axis='index')
+    total_of_pickups = len(df_complete)
+
+    df_complete = df_complete.set_axis(np.arange(len(df_complete.columns)), axis='columns')
+    df_complete['Set'] = 'IVR'
+    df_complete = df_complete.loc[(df_complete.iloc[:, 2].str.len() == 10)]
+    df_complete = keypress_columns_to_categorical(df_complete)
+    df_complete.attrs['ingest_engine'] = engine
+    df_complete.attrs['rejected_phones'] = rejected_report
+
+    _, phonenum_combined = merger([df_complete], [phonenum_list])
+    return df_complete, phonenum_combined, total_calls_made, total_of_pickups
+
+def _process_file_source(file_name: str, source: Union[str, bytes], fast: bool = True, chunksize: Optional[int] = None, on_chunk: Optional[Callable[[int], None]] = None) -> Tuple[Optional[Tuple[pd.DataFrame, pd.DataFrame, int, int]], Optional[str]]:
+    """
+    Worker entry point for process_files_parallel. Runs process_file (or process_file_chunked
+    when a chunksize is given) on one file, given by its path or its raw bytes, and turns any
+    failure into an error message instead of raising. Cancellation (JobCancelled) is raised through.
+    """
+    uploaded_file = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+    try:
+        if chunksize:
+            return process_file_chunked(uploaded_file, chunksize=chunksize, on_chunk=on_chunk), None
+        df_complete, phonenum_combined, total_calls_made, total_of_pickups, _, _ = process_file(uploaded_file, fast=fast)
+        return (df_complete, phonenum_combined, total_calls_made, total_of_pickups), None
+    except JobCancelled:
+        raise
+    except Exception as e:
+        return None, f"Error processing {file_name}: {e}"
+
+def _init_pool_worker(copy_on_write: bool, progress_queue: Any = None, cancel_event: Any = None) -> None:
+    """
+    Initialiser of the process_files_parallel pool. Workers start in a fresh interpreter, so
+    the caller's Copy-on-Write mode is turned on again here; with progress tracking, the
+    queue and cancel event are kept for _pool_process_file.
+    """
+    global _worker_progress
+    if copy_on_write:
+        enable_copy_on_write()
+    if progress_queue is not None:
+        _worker_progress = (progress_queue, cancel_event)
+
+def _shutdown_in_background(executor: ProcessPoolExecutor, *resources: Any) -> None:
+    """
+    Shuts an abandoned pool down, dropping its pending files, and waits for its workers to
+    exit on a daemon thread. The thread keeps the pool's queue and event alive meanwhile:
+    workers that are still starting reopen them by name.
+    """
+    threading.Thread(target=lambda: executor.shutdown(cancel_futures=True) or resources, name='pool-shutdown', daemon=True).start()
+
+def _pool_process_file(file_name: str, source: Union[str, bytes], fast: bool = True, chunksize: Optional[int] = None, trace: bool = False) -> Tuple[Optional[Tuple[pd.DataFrame, pd.DataFrame, int, int]], Optional[str], Optional[List[Dict[str, Any]]]]:
+    """
+    Pool entry point of process_files_parallel. In a pool started with progress tracking (see
+    _init_pool_worker), sends (file name, rows read) to the parent after every chunk and
+    stops at the next chunk once the batch is cancelled. With trace set, the file is processed
+    under a tracer of the worker's own, whose spans are returned for the parent to merge.
+
+    Returns:
+    - tuple: (result, error) as returned by _process_file_source, and the exported spans or None.
+    """
+    on_chunk = None
+    if _worker_progress is not None:
+        progress_queue, cancel_event = _worker_progress
+        if cancel_event.is_set():
+            raise JobCancelled(file_name)
+
+        def on_chunk(rows_read: int) -> None:
+            if cancel_event.is_set():
+                raise JobCancelled(file_name)
+            progress_queue.put((file_name, rows_read))
+
+    if not trace:
+        return (*_process_file_source(file_name, source, fast, chunksize, on_chunk), None)
+    tracer = Tracer()
+    with activate(tracer):
+        result, error = _process_file_source(file_name, source, fast, chunksize, on_chunk)
+    return result, error, tracer.export_spans()
+
+@traced()
+def process_files_parallel(files: List[Tuple[str, Union[str, bytes]]], max_workers: Optional[int] = None, fast: bool = True, chunksize: Optional[int] = None, cache: Optional[ProcessedFileCache] = None, progress: Optional[Callable[[str, Optional[int], bool], None]] = None, cancel_event: Optional[Any] = None) -> List[Tuple[str, Optional[Tuple[pd.DataFrame, pd.DataFrame, int, int]], Optional[str]]]:
+    """
+    Runs process_file on several uploaded files using a pool of worker processes.
+
+    Files are best given by path: each worker then reads its own file (in chunks, in
+    streaming mode), so neither this process nor the pool holds the raw exports in memory.
+    Raw bytes are also accepted, but are pickled into the worker whole. Results are returned
+    in the same order as the input files, and a file that fails to process is reported
+    through its error message without stopping the rest of the batch.
+
+    Parameters:
+    - files (list of tuple): (file name, file path) pairs, or (file name, file bytes) pairs.
+    - max_workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+                                   With a single worker (or a single file) the files are processed in this process.
+    - fast (bool): Passed through to process_file.
+    - chunksize (int, optional): If set, each file is processed with process_file_chunked using this many rows per chunk.
+    - cache (ProcessedFileCache, optional): If given, files whose content hash is already cached are not
+                                            processed again, and newly processed results are stored in it.
+    - progress (callable, optional): Called as progress(file name, rows read, finished): after every chunk
+                                     (streaming mode only) with finished=False, and with (file name, None, True)
+                                     when a file is done, in this process.
+    - cancel_event (threading.Event, optional): Once set, no further files or chunks are processed and
+                                                JobCancelled is raised; files already being parsed without
+                                                chunks in a worker finish in the background.
+
+    When a tracer is active, each pool worker records its steps with a tracer of its own and
+    its spans are merged under this call's span as the file finishes.
+
+    Returns:
+    - A list with one (file_name, result, error) tuple per input file, where result is
+      (df_complete, phonenum_combined, total_calls_made, total_of_pickups) or None when error is set.
+    """
+    def check_cancelled() -> None:
+        if cancel_event is not None and cancel_event.is_set():
+            raise JobCancelled("process_files_parallel")
+
+    def finished(name: str) -> None:
+        if progress is not None:
+            progress(name, None, True)
+
+    results = {}
+    pending = []
+    keys = {}
+    for position, (name, data) in enumerate(files):
+        if cache is not None:
+            keys[position] = content_hash(data)
+            cached = cache.get(keys[position])
+            if cached is not None:
+                results[position] = (name, cached, None)
+                finished(name)
+                continue
+        pending.append((position, name, data))
+
+    if max_workers == 1 or len(pending) <= 1:
+        for position, name, data in pending:
+            check_cancelled()
+
+            def on_chunk(rows_read: int, name: str = name) -> None:
+                check_cancelled()
+                if progress is not None:
+                    progress(name, rows_read, False)
+
+            results[position] = (name, *_process_file_source(name, data, fast, chunksize, on_chunk))
+            finished(name)
+    else:
+        tracked = progress is not None or cancel_event is not None
+        mp_context = multiprocessing.get_context(POOL_START_METHOD)
+        initargs = (bool(pd.get_option('mode.copy_on_write')),)
+        if tracked:
+            progress_queue, worker_cancel = mp_context.Queue(), mp_context.Event()
+            initargs += (progress_queue, worker_cancel)
+        executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context, initializer=_init_pool_worker, initargs=initargs)
+        tracer = active_tracer()
+
+        try:
+            futures = {executor.submit(_pool_process_file, name, data, fast, chunksize, tracer is not None): (position, name) for position, name, data in pending}
+            not_done = set(futures)
+            while not_done:
+                done, not_done = wait(not_done, timeout=PROGRESS_POLL_SECONDS if tracked else None, return_when=FIRST_COMPLETED)
+                if tracked:
+                    while True:
+                        try:
+                            name, rows_read = progress_queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if progress is not None:
+                            progress(name, rows_read, False)
+                    check_cancelled()
+                for future in done:
+                    position, name = futures[future]
+                    try:
+                        result, error, spans = future.result()
+                    except Exception as e:  # e.g. a worker died and broke the pool
+                        result, error, spans = None, f"Error processing {name}: {e}", None
+                    if spans and tracer is not None:
+                        tracer.merge(spans)
+                    results[position] = (name, result, error)
+                    finished(name)
+        except BaseException:
+            # Cancelled (or the progress callback failed): stop the workers' chunk loops and
+            # drop the files not started yet instead of waiting for the whole batch.
+            if tracked:
+                worker_cancel.set()
+                _shutdown_in_background(executor, progress_queue, worker_cancel)
+            else:
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+
+    if cache is not None:
+        for position, _, _ in pending:
+            _, result, error = results[position]
+            if error is None:
+                cache.put(keys[position], result)
+
+    return [results[position] for position in range(len(files))]
+
+class CampaignAccumulator:
+    """
+    Collects the per-file outputs of process_file for one upload batch.
+
+    Frames are only appended when a file is added; the merged campaign frame and the
+    deduplicated phone number frame are built lazily, a single time, the first time they
+    are requested, and reused on every rerun afterwards. Running totals are kept as plain
+    integers so the statistics never need the merged frame.
+    """
+    def __init__(self):
+        self.frames: List[pd.DataFrame] = []
+        self.phonenum_frames: List[pd.DataFrame] = []
+        self.total_calls_made = 0
+        self.total_pickups = 0
+        self.total_CRs = 0
+        self.total_phonenum = 0  # Phone numbers with a key press, before deduplication across files
+        self.file_count = 0
+        self._merged: Optional[pd.DataFrame] = None
+        self._phonenum: Optional[pd.DataFrame] = None
+
+    def add(self, df_complete: pd.DataFrame, phonenum_list: pd.DataFrame, total_calls_made: int, total_of_pickups: int) -> None:
+        """
+        Registers the outputs of one processed file and updates the running totals.
+        """
+        self.frames.append(df_complete)
+        self.phonenum_frames.append(phonenum_list)
+        self.total_calls_made += total_calls_made
+        self.total_pickups += total_of_pickups
+        self.total_CRs += len(df_complete)
+        self.total_phonenum += len(phonenum_list)
+        self.file_count += 1
+        self._merged = None
+        self._phonenum = None
+
+    @property
+    def pick_up_rate_percentage(self) -> float:
+        return (self.total_pickups / self.total_calls_made) * 100 if self.total_calls_made > 0 else 0
+
+    def merged(self) -> pd.DataFrame:
+        """
+        Returns the complete rows of every added file as one DataFrame, concatenating only once.
+        """
+        if self._merged is None:
+            self._merged = concat_categorical(self.frames)
+        return self._merged
+
+    def phonenum(self) -> pd.DataFrame:
+        """
+        Returns the deduplicated phone numbers of every added file, concatenating only once.
+        """
+        if self._phonenum is None:
+            self._phonenum = pd.concat(self.phonenum_frames, ignore_index=True).drop_duplicates() if self.phonenum_frames else pd.DataFrame()
+        return self._phonenum
+
+    def compact(self) -> None:
+        """
+        Replaces the per-file frames with the merged frames, so the batch is held in memory
+        once rather than twice. Files added afterwards are merged onto the compacted frames.
+        """
+        if self.file_count:
+            self.frames = [self.merged()]
+            self.phonenum_frames = [self.phonenum()]
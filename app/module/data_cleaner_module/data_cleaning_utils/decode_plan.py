@@ -0,0 +1,195 @@
+import re
+import json
+import pandas as pd
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from module.data_cleaner_module.data_cleaning_utils.rows_definer_utils import decode_keypresses, drop_duplicates_from_dataframe
+from module.data_cleaner_module.data_cleaning_utils.group_classifier import add_derived_groups
+from module.data_cleaner_module.data_cleaning_utils.jobs import Job
+from module.data_cleaner_module.data_cleaning_utils.instrumentation import traced
+
+DECODE_PLAN_VERSION = 1
+EDITOR_COLUMNS = ["Question", "Value", "Label", "Drop"]
+
+def _keypress_sort_key(value: str) -> float:
+    """
+    Sorts keypress values like 'FlowNo_3=2' by their answer number, anything else last.
+    """
+    match = re.search(r'=(\d+)$', str(value))
+    return int(match.group(1)) if match else float('inf')
+
+def unique_keypress_values(series: pd.Series) -> list:
+    """
+    Returns the distinct non-null values of a keypress column in answer order.
+    Categorical columns are read off their categories instead of scanning the rows.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        values = series.cat.remove_unused_categories().cat.categories
+    else:
+        values = series.dropna().unique()
+    return sorted(values, key=_keypress_sort_key)
+
+def _all_strings(values: Iterable[Any]) -> bool:
+    return all(isinstance(value, str) for value in values)
+
+class DecodePlan:
+    """
+    Everything needed to decode a renamed IVR frame: per-column keypress mappings, excluded
+    keypress values and dropped questions.
+
+    A plan is compiled once from the parsed script and the operator's edits in the decoder
+    tabs, can be saved to and loaded from JSON, and applied to any cleaned frame of the same
+    questionnaire.
+    """
+    def __init__(self, keypress_mappings: Optional[Dict[str, Dict[str, str]]] = None, excluded_flow_nos: Optional[Dict[str, List[str]]] = None, drop_cols: Optional[List[str]] = None):
+        self.keypress_mappings = {col: dict(mappings) for col, mappings in (keypress_mappings or {}).items() if mappings}
+        self.excluded_flow_nos = {col: list(values) for col, values in (excluded_flow_nos or {}).items() if values}
+        self.drop_cols = list(drop_cols or [])
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, DecodePlan) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"DecodePlan(columns={len(self.keypress_mappings)}, excluded={sum(map(len, self.excluded_flow_nos.values()))}, dropped={len(self.drop_cols)})"
+
+    @classmethod
+    def from_schema(cls, schema: Any, question_columns: Iterable[str]) -> "DecodePlan":
+        """
+        Compiles a plan that decodes every question column with the answers of a QuestionnaireSchema.
+        """
+        return cls({col: schema.answer_lookup for col in question_columns})
+
+    def with_edits(self, keypress_mappings: Optional[Dict[str, Dict[str, str]]] = None, excluded_flow_nos: Optional[Dict[str, List[str]]] = None, drop_cols: Optional[List[str]] = None) -> "DecodePlan":
+        """
+        Returns a new plan with the operator's edits layered on top of this one.
+        Column mappings are merged value by value; exclusions and dropped questions are added.
+        """
+        merged_mappings = {col: dict(mappings) for col, mappings in self.keypress_mappings.items()}
+        for col, mappings in (keypress_mappings or {}).items():
+            merged_mappings.setdefault(col, {}).update(mappings)
+
+        merged_excluded = {col: list(values) for col, values in self.excluded_flow_nos.items()}
+        for col, values in (excluded_flow_nos or {}).items():
+            merged_excluded.setdefault(col, [])
+            merged_excluded[col] += [val for val in values if val not in merged_excluded[col]]
+
+        merged_drop_cols = self.drop_cols + [col for col in (drop_cols or []) if col not in self.drop_cols]
+        return DecodePlan(merged_mappings, merged_excluded, merged_drop_cols)
+
+    @traced()
+    def editor_table(self, df: pd.DataFrame, question_columns: Iterable[str], default_labels: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        """
+        Lays the plan out as one row per question and keypress value for the bulk mapping editor.
+
+        Parameters:
+        - df (pd.DataFrame): The renamed data whose keypress values are listed.
+        - question_columns (iterable): The keypress columns to list.
+        - default_labels (dict): FlowNo -> label used where the plan has no label (e.g. the script's answers).
+
+        Returns:
+        - pd.DataFrame: Columns Question, Value, Label and Drop, prefilled from the plan.
+        """
+        default_labels = default_labels or {}
+        rows = [
+            (col, val, self.label_for(col, val, default_labels.get(val, "")), self.is_excluded(col, val))
+            for col in question_columns
+            for val in unique_keypress_values(df[col])
+        ]
+        return pd.DataFrame(rows, columns=EDITOR_COLUMNS)
+
+    @classmethod
+    def from_editor_table(cls, table: pd.DataFrame, drop_cols: Optional[List[str]] = None) -> "DecodePlan":
+        """
+        Builds a plan from the rows of the bulk mapping editor: dropped values become exclusions,
+        non-empty labels become mappings and the questions in drop_cols are dropped entirely.
+        """
+        drop_cols = list(drop_cols or [])
+        keypress_mappings: Dict[str, Dict[str, str]] = {}
+        excluded_flow_nos: Dict[str, List[str]] = {}
+        for col, val, label, drop in table[EDITOR_COLUMNS].itertuples(index=False):
+            if col in drop_cols:
+                continue
+            if drop:
+                excluded_flow_nos.setdefault(col, []).append(val)
+            elif isinstance(label, str) and label:
+                keypress_mappings.setdefault(col, {})[val] = label
+        return cls(keypress_mappings, excluded_flow_nos, drop_cols)
+
+    def label_for(self, col: str, value: str, default: str = "") -> str:
+        """
+        Returns the readable label the plan assigns to a keypress value of a column.
+        """
+        return self.keypress_mappings.get(col, {}).get(value, default)
+
+    def is_excluded(self, col: str, value: str) -> bool:
+        return value in self.excluded_flow_nos.get(col, [])
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Decodes one renamed frame in a single vectorised call (see decode_keypresses).
+        """
+        return decode_keypresses(df, self.keypress_mappings, self.excluded_flow_nos, self.drop_cols)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": DECODE_PLAN_VERSION,
+            "keypress_mappings": self.keypress_mappings,
+            "excluded_flow_nos": self.excluded_flow_nos,
+            "drop_cols": self.drop_cols
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DecodePlan":
+        """
+        Builds a plan from its to_dict() form. Raises ValueError if the structure or the types
+        of its fields are not those of a decode plan.
+        """
+        if not isinstance(data, dict):
+            raise ValueError("A decode plan must be a JSON object")
+        version = data.get("version", DECODE_PLAN_VERSION)
+        if not isinstance(version, int) or isinstance(version, bool):
+            raise ValueError(f"Invalid decode plan version: {version!r}")
+        if version > DECODE_PLAN_VERSION:
+            raise ValueError(f"Unsupported decode plan version: {version}")
+
+        keypress_mappings = data.get("keypress_mappings") or {}
+        if not isinstance(keypress_mappings, dict) or not all(isinstance(mappings, dict) and _all_strings(mappings) and _all_strings(mappings.values()) for mappings in keypress_mappings.values()):
+            raise ValueError("keypress_mappings must map each column to an object of keypress value -> label strings")
+        excluded_flow_nos = data.get("excluded_flow_nos") or {}
+        if not isinstance(excluded_flow_nos, dict) or not all(isinstance(values, list) and _all_strings(values) for values in excluded_flow_nos.values()):
+            raise ValueError("excluded_flow_nos must map each column to a list of keypress value strings")
+        drop_cols = data.get("drop_cols") or []
+        if not isinstance(drop_cols, list) or not _all_strings(drop_cols):
+            raise ValueError("drop_cols must be a list of column name strings")
+        return cls(keypress_mappings, excluded_flow_nos, drop_cols)
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+    @classmethod
+    def from_json(cls, text: str) -> "DecodePlan":
+        return cls.from_dict(json.loads(text))
+
+    def save(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_json())
+
+    @classmethod
+    def load(cls, path: str) -> "DecodePlan":
+        with open(path, encoding='utf-8') as f:
+            return cls.from_json(f.read())
+
+def decode_job(job: Job, plan: DecodePlan, df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, pd.Series]]:
+    """
+    Background job running the decode steps of the Decode Keypresses button: applies the plan,
+    adds the derived groups and drops duplicate rows, reporting progress between the steps.
+
+    Returns:
+    - tuple: (decoded DataFrame, unmatched labels per derived group as returned by add_derived_groups).
+    """
+    job.report(0.0, f"Decoding {len(df):,} rows")
+    decoded = plan.apply(df)
+    job.report(0.5, "Adding derived groups")
+    decoded, unmatched_groups = add_derived_groups(decoded)
+    job.report(0.8, "Dropping duplicate rows")
+    decoded = drop_duplicates_from_dataframe(decoded)
+    return decoded, unmatched_groups
@@ -0,0 +1,101 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+from typing import Union
+from module.data_cleaner_module.data_cleaning_utils.data_cleaner_utils import normalize_phone_numbers
+
+PhoneNumbers = Union[pd.Series, np.ndarray, list]
+
+def phone_numbers_to_int64(numbers: PhoneNumbers) -> np.ndarray:
+    """
+    Converts phone numbers to an int64 array with normalize_phone_numbers, dropping anything
+    that cannot be normalised (e.g. the 'PhoneNo' header value, empty cells or integers with
+    too few or too many digits).
+
+    Parameters:
+    - numbers: Phone numbers as strings or integers.
+
+    Returns:
+    - np.ndarray: The valid numbers as int64, in input order.
+    """
+    phone_numbers, _ = normalize_phone_numbers(pd.Series(numbers))
+    return phone_numbers.to_numpy(dtype=np.int64)
+
+class DialedNumberIndex:
+    """
+    Persistent, sorted set of every phone number dialed across campaigns.
+
+    The numbers are stored as a sorted, duplicate-free int64 array in a .npy file, which is
+    memory-mapped on load so opening a long history costs nothing up front. Membership for
+    millions of numbers is checked with one vectorised binary search, and each processed
+    batch is merged in with a single sorted union written atomically next to the old file.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._numbers = self._load()
+
+    def __len__(self) -> int:
+        return len(self._numbers)
+
+    def _load(self) -> np.ndarray:
+        if os.path.exists(self.path):
+            return np.load(self.path, mmap_mode='r')
+        return np.empty(0, dtype=np.int64)
+
+    def contains(self, numbers: PhoneNumbers) -> np.ndarray:
+        """
+        Checks in bulk which numbers have been dialed before.
+
+        Parameters:
+        - numbers: Phone numbers as strings or integers. Values that cannot be normalised are never contained.
+
+        Returns:
+        - np.ndarray: A boolean array aligned with the input, True where the number is already in the index.
+        """
+        series = pd.Series(numbers).reset_index(drop=True)
+        phone_numbers, _ = normalize_phone_numbers(series)
+        found = np.zeros(len(series), dtype=bool)
+        found[phone_numbers.index.to_numpy()] = self._lookup(phone_numbers.to_numpy(dtype=np.int64))
+        return found
+
+    def _lookup(self, values: np.ndarray) -> np.ndarray:
+        index = self._numbers
+        if len(index) == 0 or len(values) == 0:
+            return np.zeros(len(values), dtype=bool)
+        positions = np.searchsorted(index, values)
+        positions[positions == len(index)] = len(index) - 1
+        return index[positions] == values
+
+    def add(self, numbers: PhoneNumbers) -> int:
+        """
+        Merges a batch of dialed numbers into the index and persists it.
+
+        Parameters:
+        - numbers: The phone numbers of one processed batch.
+
+        Returns:
+        - int: How many of the numbers were not in the index before.
+        """
+        new_numbers = np.unique(phone_numbers_to_int64(numbers))
+        with self._lock:
+            new_numbers = new_numbers[~self.contains(new_numbers)]
+            if len(new_numbers) == 0:
+                return 0
+
+            merged = np.concatenate([self._numbers, new_numbers])
+            merged.sort(kind='stable')
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp.npy"
+            np.save(tmp_path, merged)
+            del merged
+            # Map the new file before it replaces the old one and publish it in a single swap, so
+            # concurrent contains() calls see either the old or the new numbers, never an empty index
+            numbers = np.load(tmp_path, mmap_mode='r')
+            os.replace(tmp_path, self.path)
+            self._numbers = numbers
+        return len(new_numbers)
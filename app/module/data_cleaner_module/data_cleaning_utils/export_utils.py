@@ -0,0 +1,266 @@
+import io
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+import weakref
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple, Union
+from module.data_cleaner_module.data_cleaning_utils.instrumentation import traced
+
+# Format name -> (file extension, MIME type)
+EXPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+    'CSV': ('.csv', 'text/csv'),
+    'Parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'Feather': ('.feather', 'application/vnd.apache.arrow.file')
+}
+
+IMPORT_EXTENSIONS = ['csv', 'parquet', 'feather', 'arrow']
+
+DEFAULT_EXPORT_CHUNK_ROWS = 100_000
+DEFAULT_PAYLOAD_CACHE_BYTES = 4 * 1024 ** 3  # 4 GiB of prepared download files kept on disk
+ARROW_COLUMN_LABELS_KEY = 'ivr.column_labels'
+
+_fingerprints: Dict[int, Tuple[weakref.ref, Tuple[int, int], str]] = {}
+
+def _columnar_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Prepares a frame for Arrow-based formats, which need string column names and a default index.
+    """
+    df = df.reset_index(drop=True)
+    if not all(isinstance(col, str) for col in df.columns):
+        df.columns = [str(col) for col in df.columns]
+    return df
+
+@traced()
+def write_dataframe(df: pd.DataFrame, fmt: str, target: Union[str, BinaryIO], chunksize: int = DEFAULT_EXPORT_CHUNK_ROWS) -> None:
+    """
+    Writes a DataFrame as CSV, Parquet or Feather, serialising `chunksize` rows at a time so
+    the encoded file is never held in memory as a whole.
+
+    Parquet and Feather (Arrow IPC) keep dtypes such as categoricals and int64 phone numbers,
+    are much smaller than CSV and load without re-parsing.
+
+    Parameters:
+    - df (pd.DataFrame): The data to export.
+    - fmt (str): One of EXPORT_FORMATS ('CSV', 'Parquet' or 'Feather').
+    - target (str or binary file): The output path or an open binary file.
+    - chunksize (int): Rows serialised per chunk (one Parquet row group / Arrow record batch per chunk).
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    if fmt == 'CSV':
+        with _open_binary(target) as f:
+            text = io.TextIOWrapper(f, encoding='utf-8', newline='', write_through=True)
+            if df.empty:
+                df.to_csv(text, index=False, lineterminator='\n')
+            for start in range(0, len(df), chunksize):
+                df.iloc[start:start + chunksize].to_csv(text, header=start == 0, index=False, lineterminator='\n')
+            text.detach()
+        return
+
+    df = _columnar_frame(df)
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    if fmt == 'Parquet':
+        writer = pq.ParquetWriter(target, schema)
+    else:
+        writer = pa.ipc.new_file(target, schema, options=pa.ipc.IpcWriteOptions(compression='lz4'))
+    with writer:
+        if df.empty:
+            writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+        for start in range(0, len(df), chunksize):
+            writer.write_table(pa.Table.from_pandas(df.iloc[start:start + chunksize], schema=schema, preserve_index=False))
+
+def write_arrow_file(df: pd.DataFrame, path: str) -> int:
+    """
+    Writes a DataFrame, index included, as an uncompressed Arrow IPC file that map_arrow_file
+    can reopen without copying. The frame is written as one record batch, since columns split
+    into several batches would have to be concatenated (copied) when converted back to pandas.
+    Integer column labels (as in freshly cleaned data) are kept in the file's metadata.
+
+    Returns:
+    - int: The size of the written file in bytes.
+
+    Raises:
+    - TypeError: If a column label is not a string or an integer, or two labels share a string form.
+    """
+    labels = list(df.columns)
+    metadata = None
+    if not all(isinstance(col, str) for col in labels):
+        names = [str(col) for col in labels]
+        if not all(isinstance(col, (str, int)) and not isinstance(col, bool) for col in labels) or len(set(names)) != len(names):
+            raise TypeError("Arrow files need unique string or integer column labels.")
+        df = df.set_axis(names, axis=1)
+        metadata = {ARROW_COLUMN_LABELS_KEY: json.dumps(labels)}
+    table = pa.Table.from_pandas(df, preserve_index=None)
+    if metadata:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return os.path.getsize(path)
+
+def map_arrow_file(path: str) -> pd.DataFrame:
+    """
+    Reopens a file written by write_arrow_file through a memory map. Numeric and categorical
+    columns stay backed by the mapped file (read-only, paged in by the OS on access); only
+    string columns are materialised as Python objects.
+    """
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    df = table.to_pandas(split_blocks=True)
+    labels = (table.schema.metadata or {}).get(ARROW_COLUMN_LABELS_KEY.encode())
+    if labels is not None:
+        df = df.set_axis(json.loads(labels), axis=1)
+    return df
+
+@contextmanager
+def _open_binary(target: Union[str, BinaryIO]) -> Iterator[BinaryIO]:
+    """
+    Yields a binary file for a path (opened and closed here) or an already open file (left open).
+    """
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, 'wb') as f:
+            yield f
+    else:
+        yield target
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Returns a content fingerprint of a DataFrame: a SHA-256 over its column names, dtypes and
+    row hashes (pd.util.hash_pandas_object).
+
+    The fingerprint is memoised per frame object, so a frame kept in session state is only
+    hashed once however often the script reruns; a change of shape invalidates the memo.
+    """
+    memo = _fingerprints.get(id(df))
+    if memo is not None and memo[0]() is df and memo[1] == df.shape:
+        return memo[2]
+
+    digest = hashlib.sha256()
+    digest.update(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    fingerprint = digest.hexdigest()
+
+    key = id(df)
+    _fingerprints[key] = (weakref.ref(df, lambda _, key=key: _fingerprints.pop(key, None)), df.shape, fingerprint)
+    return fingerprint
+
+def with_extension(filename: str, fmt: str = 'CSV') -> str:
+    """
+    Makes sure a download filename ends with the extension of the chosen format.
+    """
+    extension = EXPORT_FORMATS[fmt][0]
+    root, current_extension = os.path.splitext(filename)
+    if current_extension.lower() in [ext for ext, _ in EXPORT_FORMATS.values()]:
+        filename = root
+    return filename + extension
+
+def mime_type(fmt: str = 'CSV') -> str:
+    return EXPORT_FORMATS[fmt][1]
+
+@traced()
+def read_dataframe(uploaded_file: Any) -> pd.DataFrame:
+    """
+    Loads a previously exported CSV, Parquet or Feather file, picking the reader from the file name.
+
+    Parameters:
+    - uploaded_file: A Streamlit UploadedFile (or any file-like object with a `name`).
+
+    Returns:
+    - pd.DataFrame: The loaded data, with dtypes preserved for the columnar formats.
+
+    Raises:
+    - ValueError: If the file cannot be read in the format its extension names (corrupt, empty or mislabelled).
+    """
+    name = getattr(uploaded_file, 'name', '')
+    extension = os.path.splitext(name)[1].lower()
+    try:
+        if extension == '.parquet':
+            return pd.read_parquet(uploaded_file)
+        if extension in ('.feather', '.arrow'):
+            return pd.read_feather(uploaded_file)
+        return pd.read_csv(uploaded_file)
+    except (ValueError, OSError, pa.ArrowException, pd.errors.EmptyDataError) as e:
+        raise ValueError(f"Could not read {name or 'the file'}: {e}") from e
+
+class DownloadPayloadCache:
+    """
+    Size-bounded LRU cache of serialised download files, keyed on (frame fingerprint, format).
+
+    Payloads are only generated when an operator asks for them and are written to files in a
+    spool directory chunk by chunk (see write_dataframe), so the serialisation does not hold
+    a full copy of the encoded data in memory and reruns do not repeat it. Identical frames,
+    e.g. the same campaign prepared by two operators, share one file. The least recently used
+    files are deleted once their total size exceeds `max_bytes`.
+    """
+    def __init__(self, spool_dir: Optional[str] = None, max_bytes: int = DEFAULT_PAYLOAD_CACHE_BYTES):
+        self.spool_dir = spool_dir or tempfile.mkdtemp(prefix='ivr_downloads_')
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, int]]" = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def get(self, df: pd.DataFrame, fmt: str) -> Optional[str]:
+        """
+        Returns the path of the prepared payload for df in the given format, or None if it has not been prepared.
+        """
+        key = (frame_fingerprint(df), fmt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not os.path.exists(entry[0]):
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def prepare(self, df: pd.DataFrame, fmt: str, chunksize: int = DEFAULT_EXPORT_CHUNK_ROWS) -> str:
+        """
+        Serialises df in chunks into the spool directory (unless already prepared) and returns the file path.
+        """
+        path = self.get(df, fmt)
+        if path is not None:
+            return path
+
+        fingerprint = frame_fingerprint(df)
+        path = os.path.join(self.spool_dir, fingerprint + EXPORT_FORMATS[fmt][0])
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        write_dataframe(df, fmt, tmp_path, chunksize)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            key = (fingerprint, fmt)
+            if key not in self._entries:
+                size = os.path.getsize(path)
+                self._entries[key] = (path, size)
+                self._nbytes += size
+            self._evict()
+        return path
+
+    def _evict(self) -> None:
+        while self._nbytes > self.max_bytes and len(self._entries) > 1:
+            _, (path, size) = self._entries.popitem(last=False)
+            self._nbytes -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+            shutil.rmtree(self.spool_dir, ignore_errors=True)
+            os.makedirs(self.spool_dir, exist_ok=True)
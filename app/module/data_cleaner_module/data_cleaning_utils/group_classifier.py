@@ -0,0 +1,177 @@
+import re
+import json
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from module.data_cleaner_module.data_cleaning_utils.instrumentation import traced
+
+Bound = Optional[float]
+_RAW_KEYPRESS = re.compile(r'^flowno_\d+=\d*$')  # Undecoded keypress values never match a numeric range
+_NUMBER = re.compile(r'(\d[\d,]*(?:\.\d+)?)(?:\s*([kK])(?![a-zA-Z]))?')  # 'k' only as a whole word: 'RM 2 kids' is 2
+_BELOW_WORDS = ('below', 'under', 'less', 'up to', 'and lower', '<')
+_ABOVE_WORDS = ('above', 'over', 'more', 'and higher', '+', '>')
+
+def _normalise_label(label: Any) -> str:
+    return ' '.join(str(label).split()).lower()
+
+def parse_numeric_range(label: Any) -> Optional[Tuple[Bound, Bound]]:
+    """
+    Parses an answer label such as 'RM4,851 to RM10,960', 'RM4,850 & below' or '60+' into
+    (low, high) bounds, with None for an open end. Returns None if the label holds no number
+    or is an undecoded keypress value such as 'FlowNo_4=3'.
+    """
+    text = _normalise_label(label)
+    if _RAW_KEYPRESS.match(text):
+        return None
+    numbers = [float(value.replace(',', '')) * (1000 if suffix else 1) for value, suffix in _NUMBER.findall(text)]
+    if not numbers:
+        return None
+    if len(numbers) >= 2:
+        return min(numbers[:2]), max(numbers[:2])
+    if any(word in text for word in _BELOW_WORDS):
+        return None, numbers[0]
+    if any(word in text for word in _ABOVE_WORDS):
+        return numbers[0], None
+    return numbers[0], numbers[0]
+
+class GroupClassifier:
+    """
+    Derives a group column (e.g. IncomeGroup) from an answer column (e.g. IncomeRange).
+
+    Each distinct label is classified once: first by an exact lookup in `labels`
+    (case and whitespace insensitive), then by parsing its numeric range and finding the
+    group range in `ranges` that contains it. The column is then mapped as a categorical
+    lookup through the codes, so the cost depends on the number of distinct labels, not rows.
+
+    Parameters:
+    - source (str): The answer column to classify.
+    - target (str): The derived column inserted right after the source column.
+    - labels (dict): Exact label -> group.
+    - ranges (list): (low, high, group) triples with None for an open end, checked in order.
+    """
+    def __init__(self, source: str, target: str, labels: Optional[Dict[str, str]] = None, ranges: Optional[Sequence[Sequence[Any]]] = None):
+        self.source = source
+        self.target = target
+        self.labels = dict(labels or {})
+        self.ranges = [(low, high, group) for low, high, group in (ranges or [])]
+        self._lookup = {_normalise_label(label): group for label, group in self.labels.items()}
+
+    def __repr__(self) -> str:
+        return f"GroupClassifier({self.source!r} -> {self.target!r}, labels={len(self.labels)}, ranges={len(self.ranges)})"
+
+    @property
+    def groups(self) -> List[str]:
+        """
+        All groups the classifier can produce, in table order.
+        """
+        groups = list(self.labels.values()) + [group for _, _, group in self.ranges]
+        return list(dict.fromkeys(groups))
+
+    def classify_label(self, label: Any) -> Optional[str]:
+        """
+        Returns the group of a single label, or None if it matches neither the label table nor a range.
+        """
+        if pd.isna(label):
+            return None
+        group = self._lookup.get(_normalise_label(label))
+        if group is not None:
+            return group
+
+        bounds = parse_numeric_range(label)
+        if bounds is None:
+            return None
+        low, high = bounds
+        for range_low, range_high, range_group in self.ranges:
+            fits_low = range_low is None or (low is not None and low >= range_low)
+            fits_high = range_high is None or (high is not None and high <= range_high)
+            if fits_low and fits_high:
+                return range_group
+        return None
+
+    def classify(self, series: pd.Series) -> Tuple[pd.Series, pd.Series]:
+        """
+        Classifies a whole column.
+
+        Parameters:
+        - series (pd.Series): The answer column, categorical or object.
+
+        Returns:
+        - pd.Series: The categorical group column, aligned with the input (NaN where unmatched).
+        - pd.Series: Row counts of the non-null labels that matched no group, indexed by label.
+        """
+        categorical = series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype('category')
+        label_groups = [self.classify_label(label) for label in categorical.cat.categories]
+
+        groups = self.groups + sorted({group for group in label_groups if group is not None and group not in self.groups})
+        group_codes = np.array([groups.index(group) if group is not None else -1 for group in label_groups] + [-1], dtype=np.int64)
+        codes = group_codes[categorical.cat.codes.to_numpy()]
+        grouped = pd.Series(pd.Categorical.from_codes(codes, categories=groups), index=series.index, name=self.target)
+
+        unmatched_labels = [label for label, group in zip(categorical.cat.categories, label_groups) if group is None]
+        unmatched = categorical[categorical.isin(unmatched_labels)].value_counts()
+        return grouped, unmatched[unmatched > 0].astype(int)
+
+    def apply(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+        """
+        Inserts the derived column next to the source column (in place) if the source column exists.
+
+        Returns:
+        - pd.DataFrame: The frame.
+        - pd.Series: Unmatched label counts (empty if the source column is missing).
+        """
+        if self.source not in df.columns:
+            return df, pd.Series(dtype=int)
+        grouped, unmatched = self.classify(df[self.source])
+        if self.target in df.columns:
+            df[self.target] = grouped
+        else:
+            df.insert(df.columns.get_loc(self.source) + 1, self.target, grouped)
+        return df, unmatched
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"source": self.source, "target": self.target, "labels": self.labels, "ranges": [list(bounds) for bounds in self.ranges]}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GroupClassifier":
+        return cls(data["source"], data["target"], data.get("labels"), data.get("ranges"))
+
+INCOME_CLASSIFIER = GroupClassifier(
+    'IncomeRange',
+    'IncomeGroup',
+    labels={
+        'RM4,850 & below': 'B40',
+        'RM4,851 to RM10,960': 'M40',
+        'RM10,961 to RM15,039': 'T20',
+        'RM15,040 & above': 'T20'
+    },
+    ranges=[(None, 4850, 'B40'), (4851, 10960, 'M40'), (10961, None, 'T20')]
+)
+
+DEFAULT_CLASSIFIERS = [INCOME_CLASSIFIER]
+
+def load_classifiers(path: str) -> List[GroupClassifier]:
+    """
+    Loads derived-group classifiers from a JSON file holding a list of GroupClassifier.to_dict() entries.
+    """
+    with open(path, encoding='utf-8') as f:
+        return [GroupClassifier.from_dict(entry) for entry in json.load(f)]
+
+@traced()
+def add_derived_groups(df: pd.DataFrame, classifiers: Optional[Sequence[GroupClassifier]] = None) -> Tuple[pd.DataFrame, Dict[str, pd.Series]]:
+    """
+    Adds every derived group column (IncomeGroup by default) whose source column is present.
+
+    Parameters:
+    - df (pd.DataFrame): The decoded data; modified in place.
+    - classifiers (list): The classifiers to apply (default: DEFAULT_CLASSIFIERS).
+
+    Returns:
+    - pd.DataFrame: The frame with the derived columns.
+    - dict: Target column -> unmatched label counts, only for columns with unmatched labels.
+    """
+    unmatched_report = {}
+    for classifier in (DEFAULT_CLASSIFIERS if classifiers is None else classifiers):
+        df, unmatched = classifier.apply(df)
+        if len(unmatched):
+            unmatched_report[classifier.target] = unmatched
+    return df, unmatched_report
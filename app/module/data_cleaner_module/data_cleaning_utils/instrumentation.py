@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import threading
+import functools
+import contextvars
+import pandas as pd
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+TRACE_ENV = 'IVR_TRACE'  # Set to 1 to record traces by default
+MAX_SPANS = 5000  # Spans kept per tracer; the oldest are dropped first
+
+_active_tracer: contextvars.ContextVar = contextvars.ContextVar('ivr_active_tracer', default=None)
+
+def tracing_enabled_by_default() -> bool:
+    return os.environ.get(TRACE_ENV, '').lower() in ('1', 'true', 'yes', 'on')
+
+def rss_bytes() -> Optional[int]:
+    """
+    Current resident set size of this process, or None where /proc is not available.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _rows(value: Any) -> Optional[int]:
+    """
+    Row count of a DataFrame/Series, or of the first element of a tuple result such as process_file's.
+    """
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    return len(value) if isinstance(value, (pd.DataFrame, pd.Series)) else None
+
+class Tracer:
+    """
+    Records spans (name, wall time, rows in/out, resident memory delta) of the pipeline steps
+    run while it is active (see activate). Spans nest: each records its depth and the span it
+    was opened in. One tracer is kept per session; `run` numbers the script reruns.
+
+    The memory delta is the change of the process's resident set size over the span, so it
+    includes allocations of other sessions running at the same time.
+
+    Spans recorded by another process (e.g. a pool worker with a tracer of its own) are
+    brought in with export_spans() there and merge() here.
+    """
+    def __init__(self, max_spans: int = MAX_SPANS):
+        self.spans: "deque[Dict[str, Any]]" = deque(maxlen=max_spans)
+        self.run = 0
+        self._origin = time.perf_counter()
+        self._created = time.time()
+        self._local = threading.local()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def new_run(self) -> int:
+        self.run += 1
+        return self.run
+
+    @contextmanager
+    def span(self, name: str, category: str = 'stage', rows_in: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Times the enclosed block. The yielded record can be given `rows_out` (or other fields).
+        """
+        stack = self._local.__dict__.setdefault('stack', [])
+        with self._lock:
+            self._next_id += 1
+            span_id = self._next_id
+        record = {
+            "id": span_id,
+            "parent": stack[-1] if stack else None,
+            "depth": len(stack),
+            "run": self.run,
+            "name": name,
+            "category": category,
+            "pid": os.getpid(),
+            "thread": threading.get_ident(),
+            "rows_in": rows_in,
+            "rows_out": None
+        }
+        stack.append(span_id)
+        rss_start = rss_bytes()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            end = time.perf_counter()
+            rss_end = rss_bytes()
+            stack.pop()
+            record["start"] = start - self._origin
+            record["seconds"] = end - start
+            record["memory_delta"] = rss_end - rss_start if rss_start is not None and rss_end is not None else None
+            self.spans.append(record)
+
+    def export_spans(self) -> List[Dict[str, Any]]:
+        """
+        The spans with their start as a time.perf_counter() value, which is comparable between
+        processes on the same machine, for merge() in another process.
+        """
+        return [dict(span, start=span["start"] + self._origin) for span in list(self.spans)]
+
+    def merge(self, spans: List[Dict[str, Any]]) -> None:
+        """
+        Adds spans exported by another tracer (see export_spans) under the span currently open
+        in this thread, e.g. a worker's spans under the process_files_parallel call that ran it.
+        """
+        stack = self._local.__dict__.setdefault('stack', [])
+        parent, depth = (stack[-1] if stack else None), len(stack)
+        with self._lock:
+            ids = {}
+            for span in spans:
+                self._next_id += 1
+                ids[span["id"]] = self._next_id
+        for span in spans:
+            self.spans.append(dict(
+                span,
+                id=ids[span["id"]],
+                parent=ids.get(span["parent"], parent),
+                depth=span["depth"] + depth,
+                run=self.run,
+                start=span["start"] - self._origin
+            ))
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+    def table(self, run: Optional[int] = None) -> pd.DataFrame:
+        """
+        The spans (of one run, if given) in start order, with names indented by depth.
+        """
+        spans = sorted((span for span in list(self.spans) if run is None or span["run"] == run), key=lambda span: span["start"])
+        return pd.DataFrame({
+            "Run": [span["run"] for span in spans],
+            "Step": ["  " * span["depth"] + span["name"] for span in spans],
+            "Seconds": [round(span["seconds"], 4) for span in spans],
+            "Rows in": pd.array([span["rows_in"] for span in spans], dtype="Int64"),
+            "Rows out": pd.array([span["rows_out"] for span in spans], dtype="Int64"),
+            "Memory delta (MiB)": [round(span["memory_delta"] / 1024 ** 2, 1) if span["memory_delta"] is not None else None for span in spans]
+        })
+
+    def to_trace(self) -> Dict[str, Any]:
+        """
+        The spans as a Trace Event Format document (loadable in Perfetto or chrome://tracing).
+        """
+        events = [{
+            "name": span["name"],
+            "cat": span["category"],
+            "ph": "X",
+            "ts": round((self._created + span["start"]) * 1e6),
+            "dur": round(span["seconds"] * 1e6),
+            "pid": span["pid"],
+            "tid": span["thread"],
+            "args": {"run": span["run"], "rows_in": span["rows_in"], "rows_out": span["rows_out"], "memory_delta_bytes": span["memory_delta"]}
+        } for span in sorted(list(self.spans), key=lambda span: span["start"])]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_trace())
+
+@contextmanager
+def activate(tracer: Optional[Tracer]) -> Iterator[Optional[Tracer]]:
+    """
+    Makes `tracer` the one traced steps record into for the enclosed block (None disables tracing).
+    """
+    token = _active_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _active_tracer.reset(token)
+
+def active_tracer() -> Optional[Tracer]:
+    return _active_tracer.get()
+
+@contextmanager
+def trace_span(name: str, category: str = 'stage', rows_in: Optional[int] = None) -> Iterator[Optional[Dict[str, Any]]]:
+    """
+    Records the enclosed block as a span of the active tracer; yields None when tracing is off.
+    """
+    tracer = _active_tracer.get()
+    if tracer is None:
+        yield None
+        return
+    with tracer.span(name, category, rows_in) as record:
+        yield record
+
+def traced(name: Optional[str] = None, category: str = 'stage') -> Callable:
+    """
+    Decorator recording each call as a span of the active tracer, with rows in (the first
+    DataFrame/Series argument) and rows out (the DataFrame/Series result, or the first element
+    of a tuple result). Without an active tracer the call costs one context variable lookup.
+    """
+    def decorator(func: Callable) -> Callable:
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _active_tracer.get()
+            if tracer is None:
+                return func(*args, **kwargs)
+            rows_in = next((len(arg) for arg in args if isinstance(arg, (pd.DataFrame, pd.Series))), None)
+            with tracer.span(label, category, rows_in) as record:
+                result = func(*args, **kwargs)
+                record["rows_out"] = _rows(result)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,111 @@
+import time
+import threading
+import traceback
+import contextvars
+from typing import Any, Callable, Optional
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+class JobCancelled(Exception):
+    """
+    Raised inside a job (or the pipeline steps it runs) once its cancellation has been requested.
+    """
+
+class Job:
+    """
+    Runs `func(job, *args, **kwargs)` on a background thread so the script run that starts it
+    returns immediately.
+
+    The function reports its progress with job.report() and stops at the next
+    job.check_cancelled() (or any step polling job.cancel_event) after job.cancel(). The
+    outcome is kept on the job (state, result, error) until the session collects it, so a
+    job keeps running across reruns. The thread runs in a copy of the starting context, so
+    an active tracer (see instrumentation.activate) also records the job's steps.
+
+    Parameters:
+    - name (str): Shown with the progress bar.
+    - func (callable): The work; receives the job as its first argument.
+    """
+    def __init__(self, name: str, func: Callable[..., Any], *args, **kwargs):
+        self.name = name
+        self.state = PENDING
+        self.progress = 0.0
+        self.message = ""
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"Job({self.name!r}, state={self.state!r}, progress={self.progress:.0%})"
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (DONE, FAILED, CANCELLED)
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def start(self) -> "Job":
+        context = contextvars.copy_context()
+        self.state = RUNNING
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=context.run, args=(self._run,), name=f"job-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        try:
+            result = self._func(self, *self._args, **self._kwargs)
+            state, error = DONE, None
+        except JobCancelled:
+            result, state, error = None, CANCELLED, None
+        except Exception as e:
+            result, state, error = None, FAILED, f"{e}\n{traceback.format_exc()}"
+        with self._lock:
+            self.result, self.error = result, error
+            self.progress = 1.0 if state == DONE else self.progress
+            self.finished_at = time.monotonic()
+            self.state = state
+
+    def report(self, progress: Optional[float] = None, message: Optional[str] = None) -> None:
+        """
+        Updates the progress (0-1) and/or the status message, then checks for cancellation.
+        """
+        with self._lock:
+            if progress is not None:
+                self.progress = min(max(float(progress), 0.0), 1.0)
+            if message is not None:
+                self.message = message
+        self.check_cancelled()
+
+    def check_cancelled(self) -> None:
+        if self.cancel_event.is_set():
+            raise JobCancelled(self.name)
+
+    def cancel(self) -> None:
+        """
+        Requests cancellation; the job stops at its next cancellation check.
+        """
+        self.cancel_event.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until the job has finished (or timeout seconds passed). Returns whether it finished.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.finished
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable
+
+def _value_counts(series: pd.Series) -> pd.Series:
+    """
+    Counts every value of a column including nulls (NaN key), most frequent first.
+    Categorical columns are counted with a single bincount over their codes.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        counts = np.bincount(codes + 1, minlength=len(series.cat.categories) + 1)
+        index = pd.Index([np.nan] + list(series.cat.categories), dtype=object)
+        value_counts = pd.Series(counts, index=index)
+        value_counts = value_counts[value_counts > 0]
+        return value_counts.sort_values(ascending=False, kind='stable')
+    return series.value_counts(dropna=False)
+
+class ColumnProfile:
+    """
+    Null counts, cardinality and normalised frequency tables for every column of a frame,
+    computed from one value count per column (nulls and cardinality are read off the counts
+    rather than recomputed with isnull/nunique).
+
+    Attributes:
+    - row_count (int): Rows in the profiled frame.
+    - summary (pd.DataFrame): One row per column with Nulls, Null %, Distinct, Top value and Top share.
+    - frequencies (dict): Column -> normalised value frequencies (nulls included), for the profiled columns.
+    """
+    def __init__(self, df: pd.DataFrame, skip_frequencies: Iterable[str] = ('phonenum',)):
+        skip_frequencies = set(skip_frequencies)
+        self.row_count = len(df)
+        self.frequencies: Dict[str, pd.Series] = {}
+
+        rows = []
+        for col in df.columns:
+            counts = _value_counts(df[col])
+            null_mask = counts.index.isna()
+            null_count = int(counts[null_mask].sum())
+            shares = counts / self.row_count if self.row_count else counts.astype(float)
+            top_value = counts.index[0] if len(counts) else None
+
+            rows.append({
+                "Column": col,
+                "Nulls": null_count,
+                "Null %": round(null_count / self.row_count * 100, 2) if self.row_count else 0.0,
+                "Distinct": int((~null_mask).sum()),
+                "Top value": None if pd.isna(top_value) else str(top_value),
+                "Top share": float(shares.iloc[0]) if len(shares) else 0.0
+            })
+            if col not in skip_frequencies:
+                self.frequencies[col] = shares.rename('proportion')
+
+        self.summary = pd.DataFrame(rows, columns=["Column", "Nulls", "Null %", "Distinct", "Top value", "Top share"])
+
+    def frequency_table(self) -> pd.DataFrame:
+        """
+        Returns the frequency tables of all profiled columns stacked into one long frame (Column, Value, Share).
+        """
+        if not self.frequencies:
+            return pd.DataFrame(columns=["Column", "Value", "Share"])
+        return pd.concat([
+            pd.DataFrame({"Column": col, "Value": shares.index.astype(object).map(lambda val: "<null>" if pd.isna(val) else str(val)), "Share": shares.to_numpy()})
+            for col, shares in self.frequencies.items()
+        ], ignore_index=True)
+
+def profile_columns(df: pd.DataFrame, skip_frequencies: Iterable[str] = ('phonenum',)) -> ColumnProfile:
+    """
+    Profiles every column of a decoded frame in one pass.
+
+    Parameters:
+    - df (pd.DataFrame): The decoded data.
+    - skip_frequencies (iterable): Columns that get nulls and cardinality but no frequency table (e.g. phone numbers).
+
+    Returns:
+    - ColumnProfile: The profile report.
+    """
+    return ColumnProfile(df, skip_frequencies)
@@ -0,0 +1,123 @@
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Union
+from module.data_cleaner_module.data_cleaning_utils.columns_definer_utils import parse_text_to_json
+
+SCHEMA_CACHE_SIZE = 32
+
+_schema_cache: "OrderedDict[str, QuestionnaireSchema]" = OrderedDict()
+_schema_lock = threading.Lock()
+
+class QuestionnaireSchema:
+    """
+    A questionnaire script compiled once into everything the tabs need: the question texts
+    and a flat FlowNo -> answer lookup.
+
+    Attributes:
+    - content_hash (str): Parse mode and SHA-256 of the script content the schema was compiled from.
+    - flow_no_mappings (dict): {"Q1": {"question": ..., "answers": {"FlowNo_2=1": ...}}}.
+    - questions (dict): Question key -> question text.
+    - answer_lookup (dict): FlowNo key -> answer text across all questions.
+    """
+    def __init__(self, flow_no_mappings: Dict[str, Dict[str, Any]], content_hash: str = ""):
+        self.content_hash = content_hash
+        self.flow_no_mappings = flow_no_mappings
+        self.questions = {q_key: q_data['question'] for q_key, q_data in flow_no_mappings.items()}
+        self.answer_lookup = {k: v for q_data in flow_no_mappings.values() for k, v in q_data['answers'].items()}
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def __bool__(self) -> bool:
+        return bool(self.questions)
+
+    def __repr__(self) -> str:
+        return f"QuestionnaireSchema(questions={len(self.questions)}, answers={len(self.answer_lookup)})"
+
+    def question_for(self, idx: int, default: Any = None) -> Any:
+        """
+        Returns the question text of the idx-th question column (1-based), or default.
+        """
+        return self.questions.get(f"Q{idx}", default)
+
+    def column_names(self, columns: List[Any]) -> List[Any]:
+        """
+        Builds the column names the Columns Definer prefills: phonenum, the question texts, then Set.
+        """
+        new_column_names = []
+        for idx, default_name in enumerate(columns):
+            if idx == 0:
+                new_column_names.append("phonenum")
+            elif idx == len(columns) - 1:
+                new_column_names.append("Set")
+            else:
+                new_column_names.append(self.question_for(idx, default_name))
+        return new_column_names
+
+def _parse(text: str, is_json: Optional[bool]) -> Dict[str, Dict[str, Any]]:
+    if is_json is False:
+        return parse_text_to_json(text)
+    try:
+        flow_no_mappings = json.loads(text)
+    except json.JSONDecodeError:
+        if is_json:
+            raise
+        return parse_text_to_json(text)
+    if not isinstance(flow_no_mappings, dict):
+        if is_json:
+            raise ValueError("The JSON flow mapping must be an object of questions.")
+        return parse_text_to_json(text)
+    _check_structure(flow_no_mappings)
+    return flow_no_mappings
+
+def _check_structure(flow_no_mappings: Dict[str, Any]) -> None:
+    """
+    Raises ValueError unless every question of a JSON flow mapping is an object with a
+    "question" text and an "answers" object of FlowNo key -> answer text.
+    """
+    for q_key, q_data in flow_no_mappings.items():
+        if not isinstance(q_data, dict) or 'question' not in q_data or 'answers' not in q_data:
+            raise ValueError(f"Question {q_key!r} of the JSON flow mapping must be an object with \"question\" and \"answers\".")
+        if not isinstance(q_data['answers'], dict):
+            raise ValueError(f"The answers of question {q_key!r} must be an object of FlowNo key -> answer.")
+
+def compile_schema(content: Union[str, bytes], is_json: Optional[bool] = None) -> QuestionnaireSchema:
+    """
+    Compiles a questionnaire script into a QuestionnaireSchema, memoised on the content hash
+    so every tab and every rerun after the first parse reuses the same schema.
+
+    Parameters:
+    - content (str or bytes): The script, either a .json flow mapping or formatted .txt.
+    - is_json (bool, optional): True to require JSON, False to parse as text, None to try JSON first.
+
+    Returns:
+    - QuestionnaireSchema: The compiled schema (shared; treat as read-only).
+
+    Raises:
+    - ValueError: If is_json is True and the content is not a JSON object (json.JSONDecodeError for invalid JSON),
+                  or a JSON flow mapping's questions do not have the structure above.
+    """
+    content_bytes = content.encode('utf-8') if isinstance(content, str) else content
+    key = f"{is_json}-{hashlib.sha256(content_bytes).hexdigest()}"
+
+    with _schema_lock:
+        schema = _schema_cache.get(key)
+        if schema is not None:
+            _schema_cache.move_to_end(key)
+            return schema
+
+    schema = QuestionnaireSchema(_parse(content_bytes.decode('utf-8'), is_json), key)
+    with _schema_lock:
+        _schema_cache[key] = schema
+        while len(_schema_cache) > SCHEMA_CACHE_SIZE:
+            _schema_cache.popitem(last=False)
+    return schema
+
+def load_schema(path: str) -> QuestionnaireSchema:
+    """
+    Compiles a questionnaire script file (.json flow mapping or formatted .txt).
+    """
+    with open(path, 'rb') as f:
+        return compile_schema(f.read(), is_json=path.lower().endswith('.json'))
@@ -0,0 +1,138 @@
+import os
+import hashlib
+import threading
+import pandas as pd
+from collections import OrderedDict
+from typing import Optional, Tuple, Union
+
+ProcessedResult = Tuple[pd.DataFrame, pd.DataFrame, int, int]
+
+RESULT_FORMAT_VERSION = 2  # Bump whenever process_file's outputs change so stale disk entries are not served
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GiB of processed frames kept in memory
+HASH_BLOCK_BYTES = 1024 ** 2  # Read size when hashing a file on disk
+
+def content_hash(source: Union[bytes, str, os.PathLike]) -> str:
+    """
+    Returns the cache key of an uploaded file: the SHA-256 hex digest of its content,
+    prefixed with the result format version. `source` is the file's bytes or its path;
+    a path is hashed block by block without loading the file.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest = hashlib.sha256(source)
+    else:
+        digest = hashlib.sha256()
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b''):
+                digest.update(block)
+    return f"v{RESULT_FORMAT_VERSION}-{digest.hexdigest()}"
+
+def _result_nbytes(result: ProcessedResult) -> int:
+    """
+    Estimates the memory held by a processed result (both frames, including string contents).
+    """
+    df_complete, phonenum_combined, _, _ = result
+    return int(df_complete.memory_usage(deep=True).sum() + phonenum_combined.memory_usage(deep=True).sum())
+
+class ProcessedFileCache:
+    """
+    Size-bounded LRU cache of process_file outputs keyed on the content hash of the file.
+
+    The in-memory tier holds at most `max_entries` results and at most `max_bytes` of frame
+    memory; the least recently used results are evicted first. When `cache_dir` is set,
+    every stored result is also pickled to disk so it survives a restart. The disk tier is
+    bounded by the same entry count, evicting the least recently used files.
+
+    The cache is shared between sessions, so the returned frames must be treated as read-only.
+    """
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES, cache_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self._entries: "OrderedDict[str, Tuple[ProcessedResult, int]]" = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        path = self._disk_path(key)
+        return key in self._entries or bool(path and os.path.exists(path))
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def _disk_path(self, key: str) -> Optional[str]:
+        return os.path.join(self.cache_dir, f"{key}.pkl") if self.cache_dir else None
+
+    def get(self, key: str) -> Optional[ProcessedResult]:
+        """
+        Returns the cached result for a content hash, or None. Disk hits are promoted to memory.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+
+        path = self._disk_path(key)
+        if path and os.path.exists(path):
+            try:
+                result = pd.read_pickle(path)
+                os.utime(path)  # Mark as recently used for disk eviction
+            except Exception:
+                result = None
+            if result is not None:
+                self._put_memory(key, result)
+                return result
+        return None
+
+    def put(self, key: str, result: ProcessedResult) -> None:
+        """
+        Stores a processed result in memory and, if persistence is enabled, on disk.
+        """
+        self._put_memory(key, result)
+
+        path = self._disk_path(key)
+        if path:
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            pd.to_pickle(result, tmp_path)
+            os.replace(tmp_path, path)
+            self._evict_disk()
+
+    def clear(self) -> None:
+        """
+        Drops every in-memory entry. Files persisted on disk are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def _put_memory(self, key: str, result: ProcessedResult) -> None:
+        nbytes = _result_nbytes(result)
+        with self._lock:
+            if key in self._entries:
+                self._nbytes -= self._entries.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return  # Too large to keep in memory; it may still live on disk
+
+            self._entries[key] = (result, nbytes)
+            self._nbytes += nbytes
+            while len(self._entries) > self.max_entries or self._nbytes > self.max_bytes:
+                _, (_, evicted_nbytes) = self._entries.popitem(last=False)
+                self._nbytes -= evicted_nbytes
+
+    def _evict_disk(self) -> None:
+        paths = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith('.pkl')]
+        if len(paths) <= self.max_entries:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
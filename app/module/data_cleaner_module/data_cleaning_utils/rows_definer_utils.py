@@ -1,41 +1,18 @@
 import re
 import streamlit as st
 import json
+import pandas as pd
+from module.data_cleaner_module.data_cleaning_utils import columns_definer_utils
+from module.data_cleaner_module.data_cleaning_utils.group_classifier import INCOME_CLASSIFIER
+from module.data_cleaner_module.data_cleaning_utils.instrumentation import traced
 
 def parse_text_to_json(text_content: str) -> dict:
     """
     Parses structured text containing survey questions and answers into a JSON-like dictionary.
     Adjusts FlowNo to start from 2 for the first question as specified.
+    Kept for backwards compatibility; the parser lives in columns_definer_utils.
     """
-    import re
-
-    # Initialize variables
-    data = {}
-    current_question = None
-
-    # Regular expressions for identifying parts of the text
-    question_re = re.compile(r'^(\d+)\.\s*(.*)')  # Adjusted to allow optional spaces after the period
-    answer_re = re.compile(r'^\s*-\s*(.*)')  # Adjusted to allow optional spaces around the dash
-
-    for line in text_content.splitlines():
-        question_match = question_re.match(line)
-        answer_match = answer_re.match(line)
-
-        if question_match:
-            # New question found
-            q_number, q_text = question_match.groups()
-            current_question = f"Q{q_number}"
-            data[current_question] = {"question": q_text, "answers": {}}
-        elif answer_match and current_question:
-            # Answer found for the current question
-            answer_text = answer_match.groups()[0]
-            # Assuming FlowNo starts at 2 for the first question and increments for each answer within a question
-            flow_no = len(data[current_question]["answers"]) + 1
-            # Adjusting FlowNo to start from 2 for the first question and increment accordingly for each answer
-            flow_no_key = f"FlowNo_{int(q_number)+1}={flow_no}"
-            data[current_question]["answers"][flow_no_key] = answer_text
-
-    return data
+    return columns_definer_utils.parse_text_to_json(text_content)
 
 def custom_sort(col: str) -> tuple:
     # Improved regex to capture question and flow numbers accurately
@@ -47,13 +24,87 @@ def custom_sort(col: str) -> tuple:
     else:
         return (float('inf'), 0)
 
+def relabel_keypresses(series: pd.Series, mappings: dict) -> pd.Series:
+    """
+    Replaces keypress values with readable labels, leaving unmapped values as they are.
+
+    For categorical columns only the categories are relabelled, so the cost does not depend
+    on the number of rows. Categories that end up with the same label are merged.
+
+    Parameters:
+    - series (pd.Series): A keypress column, e.g. values like 'FlowNo_3=2'.
+    - mappings (dict): Keypress value -> readable label.
+
+    Returns:
+    - pd.Series: The relabelled column, with the same dtype kind as the input.
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series.map(mappings).fillna(series)
+
+    new_labels = pd.Index([mappings.get(category, category) for category in series.cat.categories])
+    if new_labels.is_unique:
+        return series.cat.rename_categories(new_labels)
+
+    label_codes, unique_labels = pd.factorize(new_labels)
+    codes = series.cat.codes.to_numpy()
+    new_codes = pd.Series(label_codes).to_numpy()[codes]
+    new_codes[codes == -1] = -1
+    return pd.Series(pd.Categorical.from_codes(new_codes, categories=unique_labels), index=series.index, name=series.name)
+
+def remove_unused_categories(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Drops categories that no longer occur (e.g. after excluding rows) from every categorical column,
+    so value_counts only reports values present in the data.
+    """
+    for col in df.select_dtypes(include='category').columns:
+        df[col] = df[col].cat.remove_unused_categories()
+    return df
+
+@traced()
+def decode_keypresses(df: pd.DataFrame, keypress_mappings: dict, excluded_flow_nos: dict = None, drop_cols: list = None) -> pd.DataFrame:
+    """
+    Decodes keypress columns in a single vectorised pass.
+
+    One combined exclusion mask is built with `isin` across every column, the dropped
+    questions and excluded rows are removed with a single selection (the only copy of the
+    frame), and then every column's mappings are applied.
+
+    Parameters:
+    - df (pd.DataFrame): The renamed data.
+    - keypress_mappings (dict): Column -> {keypress value: readable label}.
+    - excluded_flow_nos (dict, optional): Column -> list of keypress values whose rows are dropped.
+    - drop_cols (list, optional): Question columns to drop entirely.
+
+    Returns:
+    - pd.DataFrame: The decoded DataFrame.
+    """
+    drop_cols = set(drop_cols or [])
+    keep_cols = [col for col in df.columns if col not in drop_cols]
+
+    exclude_mask = None
+    for col, values in (excluded_flow_nos or {}).items():
+        if values and col in keep_cols:
+            col_mask = df[col].isin(values).to_numpy()
+            exclude_mask = col_mask if exclude_mask is None else exclude_mask | col_mask
+
+    if exclude_mask is None:
+        decoded = df[keep_cols].copy()
+    else:
+        decoded = df.loc[~exclude_mask, keep_cols]
+
+    for col, col_mappings in keypress_mappings.items():
+        if col in decoded.columns and col_mappings:
+            decoded[col] = relabel_keypresses(decoded[col], col_mappings)
+
+    return remove_unused_categories(decoded)
+
 def classify_income(income: str) -> str:
-    if income == 'RM4,850 & below':
-        return 'B40'
-    elif income == 'RM4,851 to RM10,960':
-        return 'M40'
-    elif income in ['RM15,040 & above', 'RM10,961 to RM15,039']:
-        return 'T20'
+    """
+    Returns the income group (B40, M40 or T20) of a single IncomeRange label, or None if it cannot be classified.
+    Use group_classifier.add_derived_groups to classify whole columns.
+    """
+    return INCOME_CLASSIFIER.classify_label(income)
+
 import json
 
 def process_file_content(uploaded_file):
@@ -75,6 +126,7 @@ def flatten_json_structure(flow_no_mappings):
         return {}
     return {k: v for question in flow_no_mappings.values() for k, v in question["answers"].items()}
 
+@traced()
 def drop_duplicates_from_dataframe(df):
     """
     Drops duplicate rows from the DataFrame.
@@ -0,0 +1,341 @@
+import os
+import time
+import uuid
+import shutil
+import tempfile
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from typing import Dict, Iterator, List, Optional
+from module.data_cleaner_module.data_cleaning_utils.export_utils import map_arrow_file, write_arrow_file
+
+STAGES = ('cleaned', 'phonenum', 'renamed', 'decoded')
+
+_buffer_sizes: Dict[int, tuple] = {}
+_buffer_lock = threading.Lock()
+
+def enable_copy_on_write() -> None:
+    """
+    Turns on pandas Copy-on-Write, so renaming, reordering and selecting columns share the
+    underlying buffers with the original frame until one of them is modified.
+    """
+    pd.set_option('mode.copy_on_write', True)
+
+def _root_array(values: np.ndarray) -> np.ndarray:
+    while isinstance(values.base, np.ndarray):
+        values = values.base
+    return values
+
+def _array_nbytes(values: np.ndarray) -> int:
+    """
+    Size of a buffer including the Python objects it references, memoised per buffer
+    (object arrays would otherwise be walked on every call).
+    """
+    if values.dtype != object:
+        return int(values.nbytes)
+
+    key = id(values)
+    with _buffer_lock:
+        memo = _buffer_sizes.get(key)
+        if memo is not None and memo[0]() is values:
+            return memo[1]
+    nbytes = int(pd.Series(values.reshape(-1), copy=False).memory_usage(deep=True, index=False))
+    try:
+        ref = weakref.ref(values, lambda _, key=key: _buffer_sizes.pop(key, None))
+    except TypeError:
+        return nbytes
+    with _buffer_lock:
+        _buffer_sizes[key] = (ref, nbytes)
+    return nbytes
+
+def _root_arrays(df: pd.DataFrame) -> Iterator[np.ndarray]:
+    for _, series in df.items():
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Categorical.codes is a view of the shared codes; Series.cat.codes would be a copy under Copy-on-Write
+            arrays = [series.array.codes, series.cat.categories.to_numpy()]
+        else:
+            arrays = [series.to_numpy(copy=False)]
+        for values in arrays:
+            if isinstance(values, np.ndarray):
+                yield _root_array(values)
+
+def frame_buffers(df: pd.DataFrame, mapped: bool = False) -> Dict[int, int]:
+    """
+    Returns the memory buffers backing a frame as {buffer id: bytes}.
+
+    Columns that share a buffer, e.g. a renamed or reordered copy-on-write view of another
+    stage's frame, resolve to the same root buffer, so summing the union of several frames'
+    buffers counts shared data once. With mapped=True (a frame reopened by map_arrow_file),
+    buffers owned by the memory map count as 0 bytes: they live in the OS page cache.
+    """
+    buffers: Dict[int, int] = {}
+    for root in _root_arrays(df):
+        if id(root) not in buffers:
+            buffers[id(root)] = 0 if mapped and root.base is not None else _array_nbytes(root)
+    return buffers
+
+class SessionDataStore:
+    """
+    Holds one frame per pipeline stage (cleaned, phonenum, renamed, decoded) for a session.
+
+    Each stage's frame is stored once, by reference. With Copy-on-Write enabled, a stage
+    derived from another one (renamed columns, reordered columns) shares the unchanged
+    columns' buffers instead of copying them, and memory accounting counts shared buffers
+    once. Stages not accessed for `max_idle_seconds` can be evicted with evict_idle().
+
+    With a `spill_dir`, frames of at least `spill_bytes` are spilled as soon as they are
+    stored, and frames idle for `spill_idle_seconds` when spill_idle() runs: the frame is
+    written to an Arrow IPC file in a per-session directory and released from memory. The
+    next get() reopens it through a memory map, so numeric and categorical columns are read
+    from the page cache without being copied (see map_arrow_file), and an idle mapped frame
+    is released again without rewriting the file.
+
+    A spilled frame that is still referenced outside the store (e.g. a local variable of a
+    running page) is not freed by spilling. Until that reference goes away the stage is
+    reported as 'pinned' with its full size, and get() hands back that frame instead of
+    mapping a second copy.
+    """
+    def __init__(self, max_idle_seconds: Optional[float] = None, spill_dir: Optional[str] = None, spill_bytes: Optional[int] = None, spill_idle_seconds: Optional[float] = None):
+        self.max_idle_seconds = max_idle_seconds
+        self.spill_dir = spill_dir
+        self.spill_bytes = spill_bytes
+        self.spill_idle_seconds = spill_idle_seconds
+        self._frames: Dict[str, Optional[pd.DataFrame]] = {}
+        self._last_access: Dict[str, float] = {}
+        self._spilled: Dict[str, tuple] = {}  # stage -> (path, file bytes, rows, columns)
+        self._released: Dict[str, weakref.ref] = {}  # spilled stage -> the frame it released
+        self._mapped: set = set()  # stages whose frame was reopened from its spill file
+        self._session_dir: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def __contains__(self, stage: str) -> bool:
+        return stage in self._frames
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    @property
+    def stages(self) -> List[str]:
+        return [stage for stage in STAGES if stage in self._frames] + [stage for stage in self._frames if stage not in STAGES]
+
+    def location(self, stage: str) -> str:
+        """
+        Where a stage's frame lives: 'memory', 'mapped' (reopened from its spill file), 'disk',
+        or 'pinned' (spilled, but the released frame is still referenced elsewhere, so it is
+        still in memory).
+        """
+        if self._frames.get(stage) is None and stage in self._spilled:
+            return 'pinned' if self._pinned(stage) is not None else 'disk'
+        return 'mapped' if stage in self._mapped else 'memory'
+
+    def _pinned(self, stage: str) -> Optional[pd.DataFrame]:
+        """
+        The frame a spilled stage released, if something outside the store still references it.
+        """
+        ref = self._released.get(stage)
+        return ref() if ref is not None else None
+
+    def put(self, stage: str, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Stores the frame of a stage, replacing the previous one, and returns it.
+        The frame is spilled right away if it reaches spill_bytes.
+        """
+        with self._lock:
+            self._remove_spill_file(stage)
+            self._frames[stage] = df
+            self._last_access[stage] = time.monotonic()
+            if self.spill_dir is not None and self.spill_bytes is not None and sum(frame_buffers(df).values()) >= self.spill_bytes:
+                self._spill(stage)
+        return df
+
+    def get(self, stage: str, default: Optional[pd.DataFrame] = None) -> Optional[pd.DataFrame]:
+        with self._lock:
+            if stage not in self._frames:
+                return default
+            df = self._frames[stage]
+            if df is None:
+                df = self._pinned(stage)
+                if df is None:
+                    df = map_arrow_file(self._spilled[stage][0])
+                    self._mapped.add(stage)
+                self._frames[stage] = df
+            self._last_access[stage] = time.monotonic()
+            return df
+
+    def drop(self, *stages: str) -> None:
+        with self._lock:
+            for stage in stages:
+                self._frames.pop(stage, None)
+                self._last_access.pop(stage, None)
+                self._remove_spill_file(stage)
+
+    def clear(self) -> None:
+        self.drop(*list(self._frames))
+
+    def _idle_stages(self, max_idle_seconds: float) -> List[str]:
+        now = time.monotonic()
+        return [stage for stage, accessed in list(self._last_access.items()) if now - accessed > max_idle_seconds]
+
+    def evict_idle(self, max_idle_seconds: Optional[float] = None) -> List[str]:
+        """
+        Drops the stages that have not been read or written for max_idle_seconds
+        (default: the store's max_idle_seconds). Returns the evicted stages.
+        """
+        max_idle_seconds = self.max_idle_seconds if max_idle_seconds is None else max_idle_seconds
+        if max_idle_seconds is None:
+            return []
+        evicted = self._idle_stages(max_idle_seconds)
+        self.drop(*evicted)
+        return evicted
+
+    def spill(self, *stages: str) -> List[str]:
+        """
+        Spills the given stages (default: all) to disk. Returns the stages that were released
+        from memory; frames Arrow cannot store (e.g. non-string column names) stay in memory.
+        """
+        if self.spill_dir is None:
+            return []
+        with self._lock:
+            return [stage for stage in (stages or list(self._frames)) if self._frames.get(stage) is not None and self._spill(stage)]
+
+    def spill_idle(self, spill_idle_seconds: Optional[float] = None) -> List[str]:
+        """
+        Spills the in-memory stages that have not been read or written for spill_idle_seconds
+        (default: the store's spill_idle_seconds). Returns the spilled stages.
+        """
+        spill_idle_seconds = self.spill_idle_seconds if spill_idle_seconds is None else spill_idle_seconds
+        if spill_idle_seconds is None:
+            return []
+        idle = [stage for stage in self._idle_stages(spill_idle_seconds) if self._frames.get(stage) is not None]
+        return self.spill(*idle) if idle else []
+
+    def _spill(self, stage: str) -> bool:
+        """
+        Writes a stage to its spill file, unless it already has one, and releases the frame.
+        Must be called with the lock held.
+        """
+        df = self._frames[stage]
+        if stage not in self._spilled:
+            if self._session_dir is None:
+                os.makedirs(self.spill_dir, exist_ok=True)
+                self._session_dir = tempfile.mkdtemp(prefix='ivr_session_', dir=self.spill_dir)
+                weakref.finalize(self, shutil.rmtree, self._session_dir, True)
+            path = os.path.join(self._session_dir, f"{stage}-{uuid.uuid4().hex}.arrow")
+            try:
+                nbytes = write_arrow_file(df, path)
+            except (pa.ArrowException, TypeError, ValueError, OSError):
+                self._remove_file(path)
+                return False
+            self._spilled[stage] = (path, nbytes, len(df), df.shape[1])
+        if stage not in self._mapped:
+            self._released[stage] = weakref.ref(df)
+        self._frames[stage] = None
+        return True
+
+    def _remove_spill_file(self, stage: str) -> None:
+        self._released.pop(stage, None)
+        self._mapped.discard(stage)
+        spilled = self._spilled.pop(stage, None)
+        if spilled is not None:
+            self._remove_file(spilled[0])
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _resident(self, stage: str) -> Optional[pd.DataFrame]:
+        """
+        The frame of a stage as far as it occupies memory: the stored frame, or a spilled
+        stage's released frame that is still referenced elsewhere.
+        """
+        df = self._frames.get(stage)
+        return df if df is not None else self._pinned(stage)
+
+    def buffers(self) -> Dict[int, int]:
+        buffers: Dict[int, int] = {}
+        for stage in self.stages:
+            df = self._resident(stage)
+            if df is not None:
+                buffers.update(frame_buffers(df, mapped=stage in self._mapped))
+        return buffers
+
+    def nbytes(self) -> int:
+        """
+        Memory held by all stages, counting buffers shared between stages once.
+        Spilled frames and the mapped columns of reopened ones are not counted, unless a
+        spilled frame is still referenced elsewhere ('pinned').
+        """
+        return sum(self.buffers().values())
+
+    def spilled_nbytes(self) -> int:
+        """
+        Size of this session's spill files on disk.
+        """
+        return sum(spilled[1] for spilled in list(self._spilled.values()))
+
+    def memory_usage(self) -> pd.DataFrame:
+        """
+        Per-stage memory report: where the frame lives, rows, columns, total bytes of the
+        stage's buffers in memory, the bytes it adds on top of the earlier stages (the rest
+        is shared with them) and the size of its spill file.
+        """
+        seen: Dict[int, int] = {}
+        rows = []
+        now = time.monotonic()
+        for stage in self.stages:
+            df = self._resident(stage)
+            spilled = self._spilled.get(stage)
+            buffers = frame_buffers(df, mapped=stage in self._mapped) if df is not None else {}
+            new_bytes = sum(nbytes for key, nbytes in buffers.items() if key not in seen)
+            seen.update(buffers)
+            rows.append({
+                "Stage": stage,
+                "Location": self.location(stage),
+                "Rows": len(df) if df is not None else spilled[2],
+                "Columns": df.shape[1] if df is not None else spilled[3],
+                "Bytes": sum(buffers.values()),
+                "Unshared bytes": new_bytes,
+                "Spilled bytes": spilled[1] if spilled is not None else 0,
+                "Idle (s)": round(now - self._last_access.get(stage, now), 1)
+            })
+        return pd.DataFrame(rows, columns=["Stage", "Location", "Rows", "Columns", "Bytes", "Unshared bytes", "Spilled bytes", "Idle (s)"])
+
+class SessionStoreRegistry:
+    """
+    Weak registry of every live session's store, for process-wide memory accounting.
+    A store disappears from the registry when its session state is garbage collected.
+    """
+    def __init__(self):
+        self._stores: "weakref.WeakValueDictionary[str, SessionDataStore]" = weakref.WeakValueDictionary()
+
+    def register(self, session_id: str, store: SessionDataStore) -> None:
+        self._stores[session_id] = store
+
+    def stores(self) -> Dict[str, SessionDataStore]:
+        return dict(self._stores.items())
+
+    def evict_idle(self, max_idle_seconds: Optional[float] = None) -> int:
+        """
+        Evicts idle stages in every session. Returns the number of evicted stages.
+        """
+        return sum(len(store.evict_idle(max_idle_seconds)) for store in self.stores().values())
+
+    def spill_idle(self, spill_idle_seconds: Optional[float] = None) -> int:
+        """
+        Spills idle stages to disk in every session. Returns the number of spilled stages.
+        """
+        return sum(len(store.spill_idle(spill_idle_seconds)) for store in self.stores().values())
+
+    def nbytes(self) -> int:
+        """
+        Memory held by all sessions' stages, counting buffers shared between sessions once.
+        """
+        buffers: Dict[int, int] = {}
+        for store in self.stores().values():
+            buffers.update(store.buffers())
+        return sum(buffers.values())
@@ -2,117 +2,117 @@ import streamlit as st
 from PIL import Image
 from datetime import datetime
 import pandas as pd
-import json
-from module.data_cleaner_module.data_cleaning_utils.rows_definer_utils import parse_text_to_json, custom_sort, classify_income, drop_duplicates_from_dataframe
+from module.data_cleaner_module.data_cleaning_utils.rows_definer_utils import custom_sort
+from module.data_cleaner_module.data_cleaning_utils.decode_plan import DecodePlan, decode_job
+from module.data_cleaner_module.data_cleaning_utils.questionnaire_schema import compile_schema
+from module.data_cleaner_module.data_cleaning_utils.export_utils import EXPORT_FORMATS, IMPORT_EXTENSIONS, frame_fingerprint, read_dataframe, with_extension
+from module.data_cleaner_module.data_cleaning_utils.instrumentation import trace_span, traced
+from utils.data_components import collect_job, column_profile_report, get_session_store, lazy_download_button, paginated_dataframe, start_job
 
 class Keypress_Decoder:
     def __init__(self):
         pass
 
+    @traced(category='page')
     def run3(self):
         st.title('Rows Definer 💼')
+        store = get_session_store()
         st.markdown("### Upload Script OR JSON Files (.txt, .json format)")
         uploaded_file = st.file_uploader("Choose a txt with formatting or json with flow-mapping file", type=['txt', 'json'], key='keypress_file_uploader')
 
-        flow_no_mappings = {}
+        schema = None
 
         if uploaded_file is not None:
-            file_content = uploaded_file.getvalue().decode("utf-8")
-
             try:
-                # Try loading as JSON first
-                flow_no_mappings = json.loads(file_content)
-            except json.JSONDecodeError:
-                # If JSON decoding fails, attempt parsing as plain text
-                flow_no_mappings = parse_text_to_json(file_content)
-
-            # Debug information in a dropdown box
-            with st.expander("Show FlowNo Mappings"):
-                st.write("FlowNo Mappings:", flow_no_mappings)
-
-            if flow_no_mappings:
-                st.success("Questions and answers parsed successfully. ✨")
-            else:
-                st.error("Parsed data is empty. Check file content and parsing logic.")
+                schema = compile_schema(uploaded_file.getvalue())
+                st.session_state['questionnaire_schema'] = schema
+            except ValueError as e:
+                st.error(f"Error parsing the script: {e}")
+
+            if schema is not None:
+                # Debug information in a dropdown box
+                with st.expander("Show FlowNo Mappings"):
+                    st.write("FlowNo Mappings:", schema.flow_no_mappings)
+
+                if schema:
+                    st.success("Questions and answers parsed successfully. ✨")
+                else:
+                    st.error("Parsed data is empty. Check file content and parsing logic.")
+        elif st.session_state.get('questionnaire_schema'):
+            schema = st.session_state['questionnaire_schema']
+            st.info("Using the script uploaded in another tab.")
         else:
             st.info("Please upload a file to parse questions and their answers.")
 
-        simple_mappings = {k: v for question in flow_no_mappings.values() for k, v in question["answers"].items()}
-        for q_key, q_data in flow_no_mappings.items():
-            for answer_key, answer_value in q_data["answers"].items():
-                simple_mappings[answer_key] = answer_value
-
-        if 'renamed_data' not in st.session_state:
-            st.session_state['renamed_data'] = pd.DataFrame()
+        simple_mappings = schema.answer_lookup if schema else {}
 
-        if 'renamed_data' in st.session_state and not st.session_state['renamed_data'].empty:
-            renamed_data = st.session_state['renamed_data']
+        renamed_upload = st.file_uploader("Or load previously exported renamed data (.parquet, .feather, .csv)", type=IMPORT_EXTENSIONS, key='renamed_data_uploader')
+        if renamed_upload is not None and st.session_state.get('renamed_data_source') != renamed_upload.file_id:
+            try:
+                store.put('renamed', read_dataframe(renamed_upload))
+                st.session_state['renamed_data_source'] = renamed_upload.file_id
+            except ValueError as e:
+                st.error(str(e))
 
+        renamed_data = store.get('renamed', pd.DataFrame())
+        if not renamed_data.empty:
             sorted_columns = sorted(renamed_data.columns, key=custom_sort)
-            renamed_data = renamed_data[sorted_columns]
-            st.session_state['renamed_data'] = renamed_data
+            if list(renamed_data.columns) != sorted_columns:
+                renamed_data = store.put('renamed', renamed_data[sorted_columns])
             st.write("Preview of Renamed Column Data:")
             st.dataframe(renamed_data.head())
 
-            keypress_mappings = {}
-            drop_cols = []
-            excluded_flow_nos = {}
-
-            question_columns = renamed_data.columns[1:-1]
-            for i, col in enumerate(question_columns, start=1):
-                st.subheader(f"Q{i}: {col}")
-                unique_values = [val for val in renamed_data[col].unique() if pd.notna(val)]
-                sorted_unique_values = sorted(unique_values, key=lambda x: int(x.split('=')[1]) if '=' in x and x.split('=')[1] else float('inf'))
-
-                if st.checkbox(f"Drop entire Question {i}", key=f"exclude_{col}"):
-                    drop_cols.append(col)
-                    continue
-
-                ### Decoder ###
-                all_mappings = {}
-                excluded_flow_nos[col] = []
+            plan_file = st.file_uploader("Load a saved decode plan (.json, optional)", type=['json'], key='decode_plan_uploader')
+            loaded_plan = DecodePlan()
+            if plan_file is not None:
+                try:
+                    loaded_plan = DecodePlan.from_json(plan_file.getvalue().decode("utf-8"))
+                    st.success(f"Decode plan loaded: {loaded_plan} ✨")
+                except (ValueError, KeyError, AttributeError) as e:
+                    st.error(f"Error loading decode plan: {e}")
+
+            question_columns = list(renamed_data.columns[1:-1])
+            mapping_table = loaded_plan.editor_table(renamed_data, question_columns, simple_mappings)
+
+            # One editor for every question and keypress value; edits are committed together on submit
+            with trace_span('mapping editor', 'render'), st.form(key='mapping_editor_form'):
+                drop_cols = st.multiselect("Drop entire questions", question_columns, default=[col for col in loaded_plan.drop_cols if col in question_columns], key='drop_questions')
+                edited_table = st.data_editor(
+                    mapping_table,
+                    key=f"mapping_editor_{frame_fingerprint(mapping_table)[:12]}",
+                    hide_index=True,
+                    use_container_width=True,
+                    disabled=["Question", "Value"],
+                    column_config={
+                        "Label": st.column_config.TextColumn("Rename to", help="Leave empty to keep the keypress value"),
+                        "Drop": st.column_config.CheckboxColumn("Drop", help="Drop rows with this keypress value")
+                    }
+                )
+                st.form_submit_button("Apply mappings")
+
+            decode_plan = DecodePlan.from_editor_table(edited_table, drop_cols)
+            st.download_button("Download decode plan as JSON", data=decode_plan.to_json(), file_name="decode_plan.json", mime='application/json', key='download_decode_plan')
+
+            export_format = st.radio("Download format for the decoded data", list(EXPORT_FORMATS), horizontal=True, key='decoder_export_format')
 
-                for idx, val in enumerate(sorted_unique_values):
-                    if pd.notna(val):
-                        autofill_value = simple_mappings.get(val, "")
-                        unique_key = f"{col}_{val}_{idx}"
-                        if st.checkbox(f"Drop '{val}'", key=f"exclude_{unique_key}"):
-                            excluded_flow_nos[col].append(val)
-                            continue
-
-                        readable_val = st.text_input(f"Rename '{val}' to:", value=autofill_value, key=unique_key)
-                        if readable_val:
-                            all_mappings[val] = readable_val
+            if st.button("Decode Keypresses"):
+                start_job('decode_job', "Decoding keypresses", decode_job, decode_plan, renamed_data)
 
-                if all_mappings:
-                    keypress_mappings[col] = all_mappings
+            job = collect_job('decode_job')
+            if job is not None:
+                renamed_data, unmatched_groups = job.result
+                for target, unmatched in unmatched_groups.items():
+                    st.warning(f"{unmatched.sum():,} rows have labels that match no {target}: " + ", ".join(f"'{label}' ({count:,})" for label, count in unmatched.items()))
 
-            if st.button("Decode Keypresses"):
-                if drop_cols:
-                    renamed_data.drop(columns=drop_cols, inplace=True)
-                for col, col_mappings in keypress_mappings.items():
-                    if col in renamed_data.columns:
-                        renamed_data[col] = renamed_data[col].map(col_mappings).fillna(renamed_data[col])
-                        for val_to_exclude in excluded_flow_nos.get(col, []):
-                            renamed_data = renamed_data[renamed_data[col] != val_to_exclude]
-
-                if 'IncomeRange' in renamed_data.columns:
-                    income_group = renamed_data['IncomeRange'].apply(classify_income)
-                    income_range_index = renamed_data.columns.get_loc('IncomeRange')
-                    renamed_data.insert(income_range_index + 1, 'IncomeGroup', income_group)
-
-                renamed_data = drop_duplicates_from_dataframe(renamed_data)
-                st.session_state['renamed_data'] = renamed_data
                 st.markdown("### Decoded Data")
                 st.write("Preview of Decoded Data:")
-                st.dataframe(renamed_data)
+                paginated_dataframe(renamed_data, key='decoded_preview')
 
                 today = datetime.now()
                 st.write(f'IVR count by Set as of {today.strftime("%d-%m-%Y").replace("-0", "-")}')
                 st.write(renamed_data['Set'].value_counts())
 
                 renamed_data.dropna(inplace=True)
-                st.session_state['renamed_data'] = renamed_data
                 st.write(f'No. of rows after dropping nulls: {len(renamed_data)} rows')
 
                 st.session_state['total_CRs'] = renamed_data.shape[0]
@@ -136,32 +136,20 @@ class Keypress_Decoder:
                 df_stats.index = df_stats.index + 1
                 st.table(df_stats)
 
-                st.write(f'Preview of Total of Null Values per Column:')
-                st.write(renamed_data.isnull().sum())
-
                 st.markdown("### Sanity check for values in each column")
-                
-                if 'column_checks' not in st.session_state:
-                    st.session_state['column_checks'] = {}
-
-                def run_sanity_check(index, col, data):
-                    st.write(f"{index}: {col}")
-                    value_counts = data[col].value_counts(normalize=True, dropna=False)
-                    st.write(value_counts)
-
-                for index, col in enumerate(renamed_data.columns, start=0):
-                    if col != 'phonenum':
-                        run_sanity_check(index, col, renamed_data)
-                        st.session_state['column_checks'][col] = True
+                profile = column_profile_report(renamed_data)
+                st.session_state['column_checks'] = {col: True for col in profile.frequencies}
 
                 formatted_date = datetime.now().strftime("%Y%m%d")
                 st.session_state['output_filename'] = f'IVR_Decoded_Data_v{formatted_date}.csv'
+                store.put('decoded', renamed_data)
 
+            if 'decoded' in store:
                 def update_output_filename():
-                    st.session_state['output_filename'] = st.session_state['output_filename_input'] + '.csv' if not st.session_state['output_filename_input'].lower().endswith('.csv') else st.session_state['output_filename_input']
+                    st.session_state['output_filename'] = st.session_state['output_filename_input']
 
                 st.text_input("Edit the filename for download", value=st.session_state['output_filename'], key='output_filename_input', on_change=update_output_filename)
-                data_as_csv = renamed_data.to_csv(index=False).encode('utf-8')
-                st.download_button("Download Decoded Data as CSV", data=data_as_csv, file_name=st.session_state['output_filename'], mime='text/csv')
+                output_filename = with_extension(st.session_state['output_filename'], export_format)
+                lazy_download_button("Decoded Data", store.get('decoded'), export_format, output_filename, key='download_decoded_data')
         else:
             st.error("No renamed data found. Please go back to the previous step and rename your data first.")
\ No newline at end of file
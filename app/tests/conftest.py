@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The app's modules are imported from the app directory, as in main.py and cli.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from module.data_cleaner_module.data_cleaning_utils.session_store import enable_copy_on_write
+
+enable_copy_on_write()  # As in main.py and cli.py
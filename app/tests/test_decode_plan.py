@@ -0,0 +1,24 @@
+"""
+Loading a decode plan rejects malformed input with ValueError, which the decoder tabs report.
+"""
+import pytest
+
+from module.data_cleaner_module.data_cleaning_utils.decode_plan import DecodePlan
+
+def test_round_trip():
+    plan = DecodePlan({"Age": {"FlowNo_2=1": "18-24"}}, {"Age": ["FlowNo_2=9"]}, ["Gender"])
+    assert DecodePlan.from_json(plan.to_json()) == plan
+
+@pytest.mark.parametrize('data', [
+    [],
+    {"version": "2"},
+    {"version": True},
+    {"version": 99},
+    {"keypress_mappings": {"a": 1}},
+    {"keypress_mappings": {"Age": {"FlowNo_2=1": 3}}},
+    {"excluded_flow_nos": {"Age": "FlowNo_2=9"}},
+    {"drop_cols": "abc"}
+])
+def test_malformed_plan_raises_value_error(data):
+    with pytest.raises(ValueError):
+        DecodePlan.from_dict(data)
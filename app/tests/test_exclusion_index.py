@@ -0,0 +1,36 @@
+"""
+The dialed-number index answers bulk membership queries and keeps its numbers across reopening.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from module.data_cleaner_module.data_cleaning_utils.exclusion_index import DialedNumberIndex
+
+def test_add_and_contains(tmp_path):
+    index = DialedNumberIndex(str(tmp_path / 'dialed.npy'))
+    assert len(index) == 0
+    assert not index.contains(['60123456789']).any()
+
+    assert index.add(['60123456789', '012-345 6780', 'PhoneNo', '60123456789']) == 2
+    assert index.add(np.array([60123456780, 60123456781], dtype=np.int64)) == 1
+    assert len(index) == 3
+
+    found = index.contains(pd.Series(['0123456789', '60123456781', '60199999999', None, 'abc'], index=[5, 3, 1, 7, 9]))
+    assert found.tolist() == [True, True, False, False, False]
+
+def test_invalid_integers_are_not_added(tmp_path):
+    index = DialedNumberIndex(str(tmp_path / 'dialed.npy'))
+    assert index.add([1, 10 ** 16]) == 0
+    assert len(index) == 0
+
+def test_persists_across_reopen(tmp_path):
+    path = str(tmp_path / 'history' / 'dialed.npy')
+    DialedNumberIndex(path).add(['60123456789', '60123456780'])
+    DialedNumberIndex(path).add(['60123456781'])
+
+    reopened = DialedNumberIndex(path)
+    assert len(reopened) == 3
+    assert reopened.contains([60123456780, 60123456781, 60123456782]).tolist() == [True, True, False]
+    assert os.listdir(tmp_path / 'history') == ['dialed.npy']
@@ -0,0 +1,19 @@
+"""
+Answer labels are parsed into numeric ranges; a 'k' suffix counts only when it is not the start of a word.
+"""
+import pytest
+
+from module.data_cleaner_module.data_cleaning_utils.group_classifier import parse_numeric_range
+
+@pytest.mark.parametrize('label, expected', [
+    ('RM4,851 to RM10,960', (4851.0, 10960.0)),
+    ('RM4,850 & below', (None, 4850.0)),
+    ('60+', (60.0, None)),
+    ('RM 10 k to RM 20K', (10000.0, 20000.0)),
+    ('1.5k+', (1500.0, None)),
+    ('RM 2 kids', (2.0, 2.0)),
+    ('30years', (30.0, 30.0)),
+    ('FlowNo_4=3', None)
+])
+def test_parse_numeric_range(label, expected):
+    assert parse_numeric_range(label) == expected
@@ -0,0 +1,41 @@
+"""
+Phone numbers are normalised to int64 in international form; anything else is rejected with its original index.
+"""
+import numpy as np
+import pandas as pd
+
+from module.data_cleaner_module.data_cleaning_utils.data_cleaner_utils import REJECTED_PHONE_SAMPLE, _rejected_phone_report, normalize_phone_numbers
+
+def test_local_and_international_numbers():
+    phones = pd.Series(['60123456789', '012-345 6789', '+60 12-345 6789', '0060123456789', ' (012) 345.6789 '])
+    phone_numbers, rejected = normalize_phone_numbers(phones)
+
+    assert phone_numbers.dtype == np.int64
+    assert phone_numbers.tolist() == [60123456789] * 5
+    assert rejected.empty
+
+def test_country_code():
+    phone_numbers, _ = normalize_phone_numbers(pd.Series(['0212345678']), country_code='65')
+    assert phone_numbers.tolist() == [65212345678]
+
+def test_rejected_values_keep_their_index():
+    phones = pd.Series(['PhoneNo', '60123456789', None, 'abc', '1234', '1234567890123456'], index=range(10, 16))
+    phone_numbers, rejected = normalize_phone_numbers(phones)
+
+    assert phone_numbers.index.tolist() == [11]
+    assert rejected.index.tolist() == [10, 12, 13, 14, 15]
+
+def test_integers_are_range_checked():
+    phones = pd.Series([60123456789, 1, -60123456789, 10 ** 15], dtype=np.int64)
+    phone_numbers, rejected = normalize_phone_numbers(phones)
+
+    assert phone_numbers.tolist() == [60123456789]
+    assert rejected.tolist() == [1, -60123456789, 10 ** 15]
+
+def test_rejected_sample():
+    rejected = pd.Series(['abc', np.nan] + ['x'] * REJECTED_PHONE_SAMPLE)
+    report = _rejected_phone_report(rejected, 100)
+
+    assert report['count'] == 100
+    assert report['sample'][:3] == ['abc', '<empty>', 'x']
+    assert len(report['sample']) == REJECTED_PHONE_SAMPLE
@@ -0,0 +1,46 @@
+"""
+process_file_chunked must produce the same outputs as process_file, whatever the chunk size.
+"""
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_ivr_csv
+from module.data_cleaner_module.data_cleaning_utils.data_cleaner_utils import process_file, process_file_chunked
+
+ROWS = 5000
+
+@pytest.fixture(params=[False, True], ids=['ragged', 'rectangular'])
+def export_path(request, tmp_path):
+    path = str(tmp_path / 'export.csv')
+    generate_ivr_csv(path, ROWS, duplicate_rate=0.05, invalid_phone_rate=0.01, rectangular=request.param, seed=3, chunk_rows=1000)
+    return path
+
+@pytest.mark.parametrize('chunksize', [700, ROWS + 1])
+def test_chunked_matches_process_file(export_path, chunksize):
+    df_complete, phonenum_combined, total_calls_made, total_of_pickups, _, _ = process_file(export_path)
+    chunked = process_file_chunked(export_path, chunksize=chunksize)
+
+    pd.testing.assert_frame_equal(chunked[0], df_complete)
+    pd.testing.assert_frame_equal(chunked[1], phonenum_combined)
+    assert chunked[2:] == (total_calls_made, total_of_pickups)
+    assert chunked[0].attrs['rejected_phones'] == df_complete.attrs['rejected_phones']
+    assert df_complete.attrs['rejected_phones']['count'] > 0
+
+def test_rejected_sample_shows_missing_cells(tmp_path):
+    path = tmp_path / 'export.csv'
+    path.write_text("Title\nNo,PhoneNo,UserKeyPress,FlowNo_2\n1,0123456789,1,2\n2,N/A,1,2\n3,,1,2\n4,abc,1,2\n")
+    expected = {'count': 3, 'sample': ['<empty>', '<empty>', 'abc']}
+
+    assert process_file(str(path))[0].attrs['rejected_phones'] == expected
+    assert process_file_chunked(str(path), chunksize=2)[0].attrs['rejected_phones'] == expected
+
+def test_named_empty_column_is_kept(tmp_path):
+    path = tmp_path / 'export.csv'
+    path.write_text("Title\nNo,PhoneNo,UserKeyPress,Extra\n1,60123456789,1,\n2,60123456780,2,\n")
+    df_complete, phonenum_combined, total_calls_made, total_of_pickups, _, _ = process_file(str(path))
+    chunked = process_file_chunked(str(path), chunksize=1)
+
+    assert (total_of_pickups, df_complete.shape) == (0, (0, 4))
+    pd.testing.assert_frame_equal(chunked[0], df_complete)
+    pd.testing.assert_frame_equal(chunked[1], phonenum_combined)
+    assert chunked[2:] == (total_calls_made, total_of_pickups)
@@ -0,0 +1,46 @@
+"""
+process_files_parallel returns one result per file in input order, and a file that fails only reports an error.
+"""
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_ivr_csv
+from module.data_cleaner_module.data_cleaning_utils.data_cleaner_utils import process_file, process_files_parallel
+from module.data_cleaner_module.data_cleaning_utils.result_cache import ProcessedFileCache
+
+@pytest.fixture
+def exports(tmp_path):
+    paths = []
+    for seed, rows in enumerate([300, 1200, 600]):
+        path = str(tmp_path / f'export_{seed}.csv')
+        generate_ivr_csv(path, rows, seed=seed)
+        paths.append(path)
+    return paths
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+@pytest.mark.parametrize('chunksize', [None, 250])
+def test_order_and_errors(exports, tmp_path, max_workers, chunksize):
+    broken = tmp_path / 'broken.csv'
+    broken.write_text("Title\nNo,Number,Answer\n1,2,3\n")
+    with open(exports[2], 'rb') as f:
+        files = [('a.csv', exports[0]), ('broken.csv', str(broken)), ('b.csv', exports[1]), ('c.csv', f.read())]
+
+    results = process_files_parallel(files, max_workers=max_workers, chunksize=chunksize)
+
+    assert [name for name, _, _ in results] == ['a.csv', 'broken.csv', 'b.csv', 'c.csv']
+    assert results[1][1] is None and results[1][2].startswith("Error processing broken.csv")
+    for (_, result, error), path in zip([results[0], results[2], results[3]], exports):
+        assert error is None
+        df_complete, phonenum_combined, total_calls_made, total_of_pickups, _, _ = process_file(path)
+        pd.testing.assert_frame_equal(result[0], df_complete)
+        pd.testing.assert_frame_equal(result[1], phonenum_combined)
+        assert result[2:] == (total_calls_made, total_of_pickups)
+
+def test_cached_files_are_not_processed_again(exports):
+    cache = ProcessedFileCache()
+    first = process_files_parallel([('a.csv', exports[0])], cache=cache)
+    finished = []
+    second = process_files_parallel([('a.csv', exports[0])], cache=cache, progress=lambda *args: finished.append(args))
+
+    assert second[0][1] is first[0][1]
+    assert finished == [('a.csv', None, True)]
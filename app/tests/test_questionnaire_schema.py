@@ -0,0 +1,23 @@
+"""
+A malformed JSON flow mapping is rejected with ValueError, which the tabs report.
+"""
+import pytest
+
+from module.data_cleaner_module.data_cleaning_utils.questionnaire_schema import compile_schema
+
+def test_json_flow_mapping():
+    schema = compile_schema('{"Q1": {"question": "Age?", "answers": {"FlowNo_2=1": "18-24"}}}', is_json=True)
+    assert schema.questions == {"Q1": "Age?"}
+    assert schema.answer_lookup == {"FlowNo_2=1": "18-24"}
+
+@pytest.mark.parametrize('content, is_json', [
+    ('{"Q1": 5}', None),
+    ('{"Q1": {"question": "x"}}', None),
+    ('{"Q1": {"question": "x", "answers": []}}', None),
+    ('{"Q1": 5}', True),
+    ('[1]', True),
+    ('{bad', True)
+])
+def test_malformed_json_raises_value_error(content, is_json):
+    with pytest.raises(ValueError):
+        compile_schema(content, is_json=is_json)
@@ -0,0 +1,61 @@
+"""
+The processed-file cache evicts least recently used results and round-trips results through its disk tier.
+"""
+import pandas as pd
+
+from module.data_cleaner_module.data_cleaning_utils.result_cache import ProcessedFileCache, content_hash
+
+def make_result(n: int):
+    df_complete = pd.DataFrame({0: range(n), 1: ['x'] * n})
+    phonenum = pd.DataFrame({'phonenum': range(n)})
+    return df_complete, phonenum, n, n
+
+def test_content_hash_of_bytes_and_path(tmp_path):
+    path = tmp_path / 'export.csv'
+    path.write_bytes(b'a,b\n1,2\n')
+    assert content_hash(b'a,b\n1,2\n') == content_hash(str(path))
+    assert content_hash(b'a,b\n1,3\n') != content_hash(str(path))
+
+def test_lru_eviction_by_entries():
+    cache = ProcessedFileCache(max_entries=2)
+    cache.put('a', make_result(1))
+    cache.put('b', make_result(2))
+    cache.get('a')
+    cache.put('c', make_result(3))
+
+    assert 'b' not in cache
+    assert cache.get('b') is None
+    assert cache.get('a')[2] == 1
+    assert cache.get('c')[2] == 3
+
+def test_lru_eviction_by_bytes():
+    one = make_result(1000)
+    cache = ProcessedFileCache(max_bytes=1)
+    cache.put('huge', one)
+    assert len(cache) == 0 and cache.nbytes == 0
+
+    cache = ProcessedFileCache()
+    cache.put('a', one)
+    cache.max_bytes = cache.nbytes * 2
+    cache.put('b', make_result(1000))
+    cache.put('c', make_result(1000))
+    assert 'a' not in cache and len(cache) == 2
+    assert cache.nbytes <= cache.max_bytes
+
+def test_disk_round_trip(tmp_path):
+    result = make_result(5)
+    ProcessedFileCache(cache_dir=str(tmp_path)).put('a', result)
+
+    reopened = ProcessedFileCache(cache_dir=str(tmp_path))
+    assert 'a' in reopened and len(reopened) == 0
+    df_complete, phonenum, total_calls_made, total_of_pickups = reopened.get('a')
+    pd.testing.assert_frame_equal(df_complete, result[0])
+    pd.testing.assert_frame_equal(phonenum, result[1])
+    assert (total_calls_made, total_of_pickups) == (5, 5)
+    assert len(reopened) == 1  # Promoted to memory
+
+def test_disk_eviction(tmp_path):
+    cache = ProcessedFileCache(max_entries=2, cache_dir=str(tmp_path))
+    for key in 'abc':
+        cache.put(key, make_result(1))
+    assert len(list(tmp_path.glob('*.pkl'))) == 2
@@ -0,0 +1,74 @@
+"""
+Stage frames move between memory, pinned, disk and mapped, and come back from disk unchanged.
+"""
+import gc
+
+import numpy as np
+import pandas as pd
+
+from module.data_cleaner_module.data_cleaning_utils.session_store import SessionDataStore
+
+def make_cleaned(n: int = 1000) -> pd.DataFrame:
+    # Freshly cleaned data has integer column labels and a trailing 'Set' column
+    df = pd.DataFrame({
+        0: np.arange(60100000000, 60100000000 + n, dtype=np.int64),
+        1: pd.Categorical(['FlowNo_2=1', 'FlowNo_2=2'] * (n // 2)),
+        2: np.linspace(0, 1, n)
+    })
+    df['Set'] = 'IVR'
+    return df
+
+def test_pinned_disk_mapped_transitions(tmp_path):
+    store = SessionDataStore(spill_dir=str(tmp_path))
+    df = make_cleaned()
+    expected = df.copy(deep=True)
+    store.put('cleaned', df)
+    assert store.location('cleaned') == 'memory'
+
+    # Still referenced here, so spilling cannot free it
+    assert store.spill('cleaned') == ['cleaned']
+    assert store.location('cleaned') == 'pinned'
+    assert store.nbytes() > 0
+    assert store.get('cleaned') is df
+    assert store.spill('cleaned') == ['cleaned']
+
+    del df
+    gc.collect()
+    assert store.location('cleaned') == 'disk'
+    assert store.nbytes() == 0
+    assert store.spilled_nbytes() > 0
+
+    mapped = store.get('cleaned')
+    assert store.location('cleaned') == 'mapped'
+    assert list(mapped.columns) == [0, 1, 2, 'Set']
+    pd.testing.assert_frame_equal(mapped, expected)
+    # Only the string column is materialised; the mapped numeric and categorical buffers are not counted
+    assert store.nbytes() < expected.memory_usage(deep=True).sum()
+
+    # An idle mapped frame is released again without rewriting its file
+    spill_files = list(tmp_path.glob('*/*.arrow'))
+    del mapped
+    gc.collect()
+    assert store.spill('cleaned') == ['cleaned']
+    assert store.location('cleaned') == 'disk'
+    assert list(tmp_path.glob('*/*.arrow')) == spill_files
+
+def test_put_spills_large_frames_and_drop_removes_files(tmp_path):
+    store = SessionDataStore(spill_dir=str(tmp_path), spill_bytes=1)
+    store.put('cleaned', make_cleaned())
+    gc.collect()
+    assert store.location('cleaned') == 'disk'
+    assert len(list(tmp_path.glob('*/*.arrow'))) == 1
+
+    store.drop('cleaned')
+    assert 'cleaned' not in store
+    assert not list(tmp_path.glob('*/*.arrow'))
+
+def test_shared_buffers_are_counted_once():
+    store = SessionDataStore()
+    cleaned = store.put('cleaned', make_cleaned())
+    store.put('renamed', cleaned.set_axis(['phonenum', 'Q1', 'Q2', 'Set'], axis=1))
+
+    report = store.memory_usage().set_index('Stage')
+    assert report.loc['renamed', 'Unshared bytes'] == 0
+    assert store.nbytes() == report.loc['cleaned', 'Bytes']
@@ -1,18 +1,46 @@
+import io
 import streamlit as st
 from PIL import Image
 import base64
 
-def get_base64_of_bin_file(bin_file):
+SIDEBAR_BACKGROUND_WIDTH = 720  # Covers the full sidebar height on a 1080p screen; the image is darkened anyway
+BANNER_WIDTH = 1280
+PROFILE_PHOTO_WIDTH = 300  # Twice the 150px display width for high-DPI screens
+PAGE_ICON_SIZE = 64
+
+@st.cache_resource(show_spinner=False)
+def load_image_bytes(path: str, max_width: int) -> bytes:
+    """
+    Reads an image once per process, downscales it to at most max_width pixels wide and
+    re-encodes it in its original format, so every rerun and session reuses the same small payload.
     """
-    Function to encode local file (image or gif) to base64 string
+    with Image.open(path) as image:
+        image_format = image.format or 'PNG'
+        if image.width > max_width:
+            image = image.resize((max_width, round(image.height * max_width / image.width)), Image.LANCZOS)
+        buffer = io.BytesIO()
+        if image_format == 'JPEG':
+            image.convert('RGB').save(buffer, format='JPEG', quality=80, optimize=True, progressive=True)
+        else:
+            image.save(buffer, format=image_format, optimize=True)
+    return buffer.getvalue()
+
+@st.cache_resource(show_spinner=False)
+def load_page_icon(path: str) -> Image.Image:
     """
-    with open(bin_file, 'rb') as f:
-        data = f.read()
-    return base64.b64encode(data).decode()
+    Returns a small copy of an image for use as the page icon.
+    """
+    with Image.open(path) as image:
+        icon = image.copy()
+    icon.thumbnail((PAGE_ICON_SIZE, PAGE_ICON_SIZE))
+    return icon
 
-def page_style():
-    # Encode the local GIF to base64
-    sidebar_gif_base64 = get_base64_of_bin_file('assets/Analytics_background.jpg')
+@st.cache_resource(show_spinner=False)
+def get_custom_style() -> str:
+    """
+    Builds the page CSS, including the downscaled sidebar background, once per process.
+    """
+    sidebar_background_base64 = base64.b64encode(load_image_bytes('assets/Analytics_background.jpg', SIDEBAR_BACKGROUND_WIDTH)).decode()
 
     # Apply custom styles, including the sidebar background GIF
     custom_style = f"""
@@ -24,7 +52,7 @@ def page_style():
             /* Sidebar background with a dark overlay */
             [data-testid="stSidebar"] > div:first-child {{
                 background-image: linear-gradient(rgba(0, 0, 0, 0.5), rgba(0, 0, 0, 0.5)), 
-                url("data:image/gif;base64,{sidebar_gif_base64}");
+                url("data:image/jpeg;base64,{sidebar_background_base64}");
                 background-size: cover;
                 background-position: center;
                 background-repeat: no-repeat;
@@ -56,22 +84,23 @@ def page_style():
             }}
         </style>
     """
-    
+    return custom_style
+
+def page_style():
     # Set the page configuration
-    icon = Image.open('photos/Round_Profile_Photo.png')
+    icon = load_page_icon('photos/Round_Profile_Photo.png')
     st.set_page_config(page_title="Fahmi Zainal", page_icon=icon, layout="wide")
 
     # Apply custom styles to the page
-    st.markdown(custom_style, unsafe_allow_html=True)
+    st.markdown(get_custom_style(), unsafe_allow_html=True)
 
     # Display the main background image
-    image = Image.open('photos/Background_Photo.png')
-    st.image(image)
+    st.image(load_image_bytes('photos/Background_Photo.png', BANNER_WIDTH))
 
     # Sidebar content
     with st.sidebar:
         # Display the round profile picture at the top of the sidebar
-        st.image("photos/Round_Profile_Photo.png", width=150)
+        st.image(load_image_bytes('photos/Round_Profile_Photo.png', PROFILE_PHOTO_WIDTH), width=150)
 
         st.markdown("""
             ## Created by [Fahmi Zainal](https://www.linkedin.com/in/fahmizainal17/)
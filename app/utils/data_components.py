@@ -0,0 +1,296 @@
+import os
+import tempfile
+import numpy as np
+from datetime import datetime
+from typing import Optional
+import streamlit as st
+import pandas as pd
+from module.data_cleaner_module.data_cleaning_utils.export_utils import DownloadPayloadCache, frame_fingerprint, mime_type
+from module.data_cleaner_module.data_cleaning_utils.profile_utils import ColumnProfile, profile_columns
+from module.data_cleaner_module.data_cleaning_utils.session_store import SessionDataStore, SessionStoreRegistry
+from module.data_cleaner_module.data_cleaning_utils.instrumentation import Tracer, traced, tracing_enabled_by_default
+from module.data_cleaner_module.data_cleaning_utils.jobs import CANCELLED, DONE, FAILED, Job
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+DEFAULT_SPILL_BYTES = 256 * 1024 ** 2  # Stage frames of 256 MiB or more are kept on disk
+
+PREVIEW_PAGE_SIZES = [10, 25, 50, 100, 500]
+ALL_COLUMNS = "(all columns)"
+NO_SORT = "(original order)"
+JOB_POLL_SECONDS = 0.5  # How often a running job's progress bar is refreshed
+
+@st.cache_resource
+def get_session_store_registry() -> SessionStoreRegistry:
+    """
+    Process-wide registry of every session's data store, for memory accounting.
+    """
+    return SessionStoreRegistry()
+
+def get_session_store() -> SessionDataStore:
+    """
+    Returns this session's store of pipeline stage frames, creating and registering it on first use.
+    Stages idle for longer than IVR_STAGE_IDLE_SECONDS (default: 3600) are evicted in every session.
+
+    Frames of IVR_SPILL_BYTES or more (default: 256 MiB), and frames idle for longer than
+    IVR_SPILL_IDLE_SECONDS (default: 600), are spilled to memory-mapped Arrow files under
+    IVR_SPILL_DIR (default: a directory in the system temp dir; set it empty to disable spilling).
+    """
+    registry = get_session_store_registry()
+    if 'data_store' not in st.session_state:
+        store = SessionDataStore(
+            max_idle_seconds=float(os.environ.get('IVR_STAGE_IDLE_SECONDS', 3600)),
+            spill_dir=os.environ.get('IVR_SPILL_DIR', os.path.join(tempfile.gettempdir(), 'ivr_spill')) or None,
+            spill_bytes=int(os.environ.get('IVR_SPILL_BYTES', DEFAULT_SPILL_BYTES)),
+            spill_idle_seconds=float(os.environ.get('IVR_SPILL_IDLE_SECONDS', 600))
+        )
+        st.session_state['data_store'] = store
+        ctx = get_script_run_ctx()
+        registry.register(ctx.session_id if ctx else str(id(store)), store)
+    registry.evict_idle()
+    registry.spill_idle()
+    return st.session_state['data_store']
+
+def memory_usage_panel() -> None:
+    """
+    Sidebar panel with this session's per-stage memory and the process-wide total across sessions.
+    """
+    registry = get_session_store_registry()
+    store = get_session_store()
+    with st.sidebar.expander("Memory usage"):
+        usage = store.memory_usage()
+        st.dataframe(usage, hide_index=True, use_container_width=True)
+        st.caption(f"This session: {store.nbytes() / 1024 ** 2:,.1f} MiB in memory, {store.spilled_nbytes() / 1024 ** 2:,.1f} MiB spilled to disk · All {len(registry.stores())} sessions: {registry.nbytes() / 1024 ** 2:,.1f} MiB")
+
+def start_traced_run() -> Optional[Tracer]:
+    """
+    Returns this session's tracer, numbered for a new rerun, if step timings are being recorded
+    (the "Record step timings" toggle, defaulting to IVR_TRACE), else None.
+    """
+    if not st.session_state.get('trace_enabled', tracing_enabled_by_default()):
+        return None
+    if 'tracer' not in st.session_state:
+        st.session_state['tracer'] = Tracer()
+    tracer = st.session_state['tracer']
+    tracer.new_run()
+    return tracer
+
+def trace_panel() -> None:
+    """
+    Sidebar panel with the recorded step timings and a JSON trace download.
+    """
+    with st.sidebar.expander("Performance trace"):
+        st.toggle("Record step timings", value=tracing_enabled_by_default(), key='trace_enabled')
+        tracer = st.session_state.get('tracer')
+        if tracer is None or not len(tracer):
+            st.caption("No steps recorded yet. Turn on recording and run a step.")
+            return
+
+        all_runs = st.checkbox("Show all runs", value=False, key='trace_all_runs')
+        st.dataframe(tracer.table(None if all_runs else tracer.run), hide_index=True, use_container_width=True)
+        st.download_button("Download trace (JSON)", data=tracer.to_json(), file_name=f"ivr_trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json", mime='application/json', key='download_trace')
+        st.button("Clear trace", on_click=tracer.clear, key='clear_trace')
+
+def start_job(key: str, name: str, func, *args, **kwargs) -> Job:
+    """
+    Starts func(job, *args, **kwargs) as a background job kept in session state under key,
+    unless a job is already running there (which is returned instead).
+    """
+    if job_running(key):
+        job = st.session_state[key]
+        st.warning(f"{job.name} is already running.")
+        return job
+    job = Job(name, func, *args, **kwargs).start()
+    st.session_state[key] = job
+    return job
+
+def job_running(key: str) -> bool:
+    """
+    Whether a background job started under key is still running.
+    """
+    job = st.session_state.get(key)
+    return job is not None and not job.finished
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def _job_progress(key: str) -> None:
+    """
+    Progress bar and Cancel button of a running job, refreshed on its own; reruns the page once the job ends.
+    """
+    job = st.session_state.get(key)
+    if job is None or job.finished:
+        st.rerun()
+    st.progress(job.progress, text=f"{job.name}: {job.message or 'starting'} ({job.elapsed:.0f}s)")
+    if job.cancel_event.is_set():
+        st.caption("Cancelling...")
+    else:
+        st.button("Cancel", on_click=job.cancel, key=f"{key}_cancel")
+
+def collect_job(key: str) -> Optional[Job]:
+    """
+    Shows the state of the background job under key and hands over its result once.
+
+    While the job runs, its progress bar is shown and None is returned; the rest of the page
+    stays usable. When it has finished, the job is removed from session state and returned if
+    it succeeded; a failure or cancellation is reported instead and None is returned.
+    """
+    job = st.session_state.get(key)
+    if job is None:
+        return None
+    if not job.finished:
+        _job_progress(key)
+        return None
+
+    del st.session_state[key]
+    if job.state == FAILED:
+        st.error(f"{job.name} failed: {job.error}")
+    elif job.state == CANCELLED:
+        st.warning(f"{job.name} was cancelled after {job.elapsed:.1f}s.")
+    return job if job.state == DONE else None
+
+@st.cache_resource
+def get_download_cache() -> DownloadPayloadCache:
+    """
+    Process-wide cache of prepared download files, shared by every session.
+    Files are spooled to IVR_DOWNLOAD_SPOOL_DIR (default: a temporary directory).
+    """
+    return DownloadPayloadCache(spool_dir=os.environ.get('IVR_DOWNLOAD_SPOOL_DIR'))
+
+@st.fragment
+@traced(category='render')
+def lazy_download_button(name: str, df: pd.DataFrame, fmt: str, file_name: str, key: str) -> None:
+    """
+    Download button whose payload is only serialised and loaded when the operator asks for it.
+
+    A "Prepare" button is shown until it is clicked; only that run serialises the frame (or
+    reuses the file prepared earlier, cached against the frame's fingerprint for every
+    session) and registers the download. Other reruns, e.g. typing a filename, show the
+    "Prepare" button again and never read the payload. The component runs as a fragment,
+    so preparing a download does not rerun the whole page.
+
+    Parameters:
+    - name (str): What is being downloaded, e.g. "Cleaned Data".
+    - df (pd.DataFrame): The data to download.
+    - fmt (str): One of EXPORT_FORMATS.
+    - file_name (str): The download filename.
+    - key (str): Unique widget key.
+    """
+    if not st.button(f"Prepare {name} for download ({fmt})", key=f"{key}_prepare"):
+        return
+    with st.spinner(f"Preparing {name}..."):
+        path = get_download_cache().prepare(df, fmt)
+
+    with open(path, 'rb') as f:
+        st.download_button(f"Download {name} as {fmt}", data=f, file_name=file_name, mime=mime_type(fmt), key=key)
+
+@st.cache_resource(max_entries=16)
+def get_column_profile(fingerprint: str, _df: pd.DataFrame) -> ColumnProfile:
+    """
+    Column profile of a frame, computed once per data fingerprint and shared by every session.
+    """
+    return profile_columns(_df)
+
+@traced(category='render')
+def column_profile_report(df: pd.DataFrame) -> ColumnProfile:
+    """
+    Renders the null counts, cardinality and value frequencies of every column as one compact report.
+    """
+    profile = get_column_profile(frame_fingerprint(df), df)
+    share_column = st.column_config.ProgressColumn(format="%.4f", min_value=0, max_value=1)
+
+    st.write(f"Column summary ({profile.row_count:,} rows):")
+    st.dataframe(profile.summary, hide_index=True, use_container_width=True, column_config={"Top share": share_column})
+    st.write("Value frequencies per column:")
+    st.dataframe(profile.frequency_table(), hide_index=True, use_container_width=True, column_config={"Share": share_column})
+    return profile
+
+def _contains_mask(series: pd.Series, text: str) -> np.ndarray:
+    """
+    Case-insensitive substring match of a column against text. Categorical columns are matched
+    on their categories only and the result broadcast through the codes.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        category_mask = np.append(series.cat.categories.astype(str).str.contains(text, case=False, regex=False), False)
+        return category_mask[series.cat.codes.to_numpy()]
+    return series.astype(str).str.contains(text, case=False, regex=False).to_numpy(dtype=bool)
+
+def preview_positions(df: pd.DataFrame, filter_col: str, filter_text: str, sort_by: str, descending: bool) -> np.ndarray:
+    """
+    Returns the row positions of df that pass the filter, in the requested sort order.
+
+    Parameters:
+    - df (pd.DataFrame): The full data.
+    - filter_col (str): Column to search, or ALL_COLUMNS.
+    - filter_text (str): Case-insensitive substring to keep; empty keeps every row.
+    - sort_by (str): Column to sort by, or NO_SORT.
+    - descending (bool): Sort direction.
+
+    Returns:
+    - np.ndarray: Positional row indices into df.
+    """
+    positions = np.arange(len(df))
+    if filter_text:
+        columns = df.columns if filter_col == ALL_COLUMNS else [filter_col]
+        mask = np.zeros(len(df), dtype=bool)
+        for col in columns:
+            mask |= _contains_mask(df[col], filter_text)
+        positions = positions[mask]
+
+    if sort_by != NO_SORT:
+        values = df[sort_by].iloc[positions].reset_index(drop=True)
+        order = values.sort_values(ascending=not descending, kind='stable', na_position='last').index.to_numpy()
+        positions = positions[order]
+    return positions
+
+@st.fragment
+@traced(category='render')
+def paginated_dataframe(df: pd.DataFrame, key: str, page_size: int = 25) -> None:
+    """
+    Previews a frame one page at a time with server-side filtering, sorting and paging.
+
+    Only the visible page is sent to the browser, so the preview costs the same for ten
+    thousand or ten million rows. The filtered and sorted row order is computed once per
+    frame and setting and kept in session state; paging only re-slices it. The component
+    runs as a fragment, so changing page reruns the preview and not the whole tab.
+
+    Parameters:
+    - df (pd.DataFrame): The data to preview.
+    - key (str): Unique prefix for the component's widget keys.
+    - page_size (int): Default rows per page (one of PREVIEW_PAGE_SIZES).
+    """
+    columns = [str(col) for col in df.columns]
+    by_name = dict(zip(columns, df.columns))
+
+    filter_column, filter_input, sort_column, sort_direction = st.columns([2, 3, 2, 1])
+    filter_col = filter_column.selectbox("Filter column", [ALL_COLUMNS] + columns, key=f"{key}_filter_col")
+    filter_text = filter_input.text_input("Contains", key=f"{key}_filter_text").strip()
+    sort_by = sort_column.selectbox("Sort by", [NO_SORT] + columns, key=f"{key}_sort_by")
+    descending = sort_direction.checkbox("Descending", key=f"{key}_descending", disabled=sort_by == NO_SORT)
+
+    filter_col = by_name.get(filter_col, ALL_COLUMNS)
+    sort_by = by_name.get(sort_by, NO_SORT)
+
+    view_params = (frame_fingerprint(df), filter_col, filter_text, sort_by, descending)
+    view = st.session_state.get(f"{key}_view")
+    if view is None or view[0] != view_params:
+        positions = None
+        if filter_text or sort_by != NO_SORT:
+            positions = preview_positions(df, filter_col, filter_text, sort_by, descending)
+        view = (view_params, positions)
+        st.session_state[f"{key}_view"] = view
+    positions = view[1]
+
+    total_rows = len(df) if positions is None else len(positions)
+    size_column, page_column = st.columns([1, 1])
+    rows_per_page = size_column.selectbox("Rows per page", PREVIEW_PAGE_SIZES, index=PREVIEW_PAGE_SIZES.index(page_size) if page_size in PREVIEW_PAGE_SIZES else 0, key=f"{key}_page_size")
+    page_count = max(1, -(-total_rows // rows_per_page))
+    page = page_column.number_input(f"Page (of {page_count:,})", min_value=1, max_value=page_count, value=1, step=1, key=f"{key}_page")
+    page = min(int(page), page_count)
+
+    start = (page - 1) * rows_per_page
+    end = min(start + rows_per_page, total_rows)
+    page_df = df.iloc[start:end] if positions is None else df.iloc[positions[start:end]]
+    st.dataframe(page_df, use_container_width=True)
+
+    summary = f"Showing rows {start + 1 if total_rows else 0:,}–{end:,} of {total_rows:,}"
+    if total_rows != len(df):
+        summary += f" (filtered from {len(df):,})"
+    st.caption(summary)
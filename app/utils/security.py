@@ -1,5 +1,5 @@
 import streamlit as st
-from PIL import Image
+from utils.component import BANNER_WIDTH, load_image_bytes
 
 def password_entered():
     """Checks whether a password entered by the user is correct."""
@@ -17,8 +17,7 @@ def check_password():
     if "password_correct" not in st.session_state:
 
         st.header(":green[*Analytics*] Survey Automation Tools")
-        image = Image.open('photos/Background_Photo.png')
-        st.image(image)
+        st.image(load_image_bytes('photos/Background_Photo.png', BANNER_WIDTH))
         st.text_input(
         "Please enter your password", type="password", on_change=password_entered, key="password"
         )